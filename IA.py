@@ -1,77 +1,207 @@
-from constantes import Pieza, Color
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from constantes import Pieza, Color, VALORES_PIEZAS, TABLAS_POSICION
+from transposicion import TablaTransposicion, TablaPeones, EXACTO, COTA_INFERIOR, COTA_SUPERIOR
+from libro import LibroAperturas
+from finales import TablasFinales
+
+
+# Puntuaciones de ordenación: capturas (MVV-LVA), movimientos killer y el resto
+PUNTOS_CAPTURA = 1 << 30
+PUNTOS_KILLER = [1 << 29, (1 << 29) - 1]
+MAXIMO_HISTORIAL = 1 << 24
+# MVV_LVA[victima][atacante]: primero la víctima más valiosa, y a igual víctima el atacante más barato
+_RANGO = {pieza: rango for rango, pieza in enumerate(sorted(Pieza, key=VALORES_PIEZAS.get))}
+MVV_LVA = [None] + [[None] + [_RANGO[victima] * 8 + len(Pieza) - _RANGO[atacante] for atacante in Pieza]
+                    for victima in Pieza]
+# Bonificación entera por cercanía al centro de la casilla destino (0 en las esquinas, 12 en el centro)
+CENTRO = [[14 - abs(7 - 2 * fila) - abs(7 - 2 * columna) for columna in range(8)] for fila in range(8)]
+# Killers por ply; basta con cubrir la profundidad máxima de búsqueda
+MAXIMO_PLY = 64
+# Valor de una posición ganada según las tablas de finales, menos las jugadas que faltan
+VALOR_FINAL = 1000000
+
+
+class BusquedaInterrumpida(Exception):
+    """Se lanza cuando la búsqueda agota su tiempo o su límite de nodos"""
+
+
+# Estado de cada proceso trabajador de la búsqueda paralela
+_alfa_compartido = None
+_busqueda_compartida = None
+_nodos_compartidos = None
+_ias_trabajador = {}
+
+
+def _inicializar_trabajador(alfa_compartido, busqueda_compartida, nodos_compartidos):
+    global _alfa_compartido, _busqueda_compartida, _nodos_compartidos
+    _alfa_compartido = alfa_compartido
+    _busqueda_compartida = busqueda_compartida
+    _nodos_compartidos = nodos_compartidos
+
+
+class _ControlTrabajador:
+    """
+    Hace en un trabajador el papel del threading.Event de cancelación. La
+    búsqueda se interrumpe cuando el proceso principal cambia el
+    identificador de búsqueda compartido, cuando entre todos los procesos se
+    agota el límite de nodos o cuando otro movimiento raíz sube la cota alfa
+    compartida por encima del umbral con el que se está buscando.
+    """
+    def __init__(self, ia, id_busqueda, limite_nodos):
+        self.ia = ia
+        self.id_busqueda = id_busqueda
+        self.limite_nodos = limite_nodos
+        self.nodos_contados = 0
+        self.umbral = float('-inf')
+
+    def contar_nodos(self):
+        """Suma al contador compartido los nodos buscados desde la última llamada y devuelve el total"""
+        with _nodos_compartidos.get_lock():
+            _nodos_compartidos.value += self.ia.nodos - self.nodos_contados
+            total = _nodos_compartidos.value
+        self.nodos_contados = self.ia.nodos
+        return total
+
+    def cancelada(self):
+        if _busqueda_compartida.value != self.id_busqueda:
+            return True
+        total = self.contar_nodos()
+        return self.limite_nodos is not None and total > self.limite_nodos
+
+    def alfa_superada(self):
+        return _alfa_compartido.value > self.umbral
+
+    def is_set(self):
+        return self.cancelada() or self.alfa_superada()
+
+
+def _buscar_movimiento_raiz(clase_tablero, fen, configuracion, movimiento, profundidad, fin, limite_nodos,
+                            id_busqueda):
+    """
+    Busca en un proceso trabajador el subárbol de un movimiento raíz. Primero
+    se comprueba con una ventana nula si el movimiento alcanza la mejor cota
+    conocida, y solo si la alcanza se vuelve a buscar para obtener su valor
+    exacto. Si mientras tanto otro trabajador sube la cota, la tarea vuelve a
+    empezar con la nueva.
+    :param limite_nodos: Nodos de toda la búsqueda, entre todos los procesos.
+    :param id_busqueda: Identificador de la búsqueda de la que forma parte la tarea.
+    :return: (valor, cortes), o None si se agotaron el tiempo o los nodos o
+             se canceló la búsqueda. El valor es exacto si alcanza la cota y,
+             si no, una cota superior por debajo de ella. Los nodos se suman
+             en el contador compartido.
+    """
+    # Cada trabajador conserva su IA, y con ella su tabla de transposición, entre tareas
+    ia = _ias_trabajador.get(configuracion)
+    if ia is None:
+        color, evaluador, memoria_tt_mb, finales = configuracion
+        ia = IA(color, memoria_tt_mb=memoria_tt_mb, evaluador=evaluador, finales=finales)
+        _ias_trabajador[configuracion] = ia
+    if ia.id_busqueda != id_busqueda:
+        # Primera tarea de una búsqueda nueva: mismo punto de partida que la búsqueda en serie
+        ia.id_busqueda = id_busqueda
+        ia.preparar_heuristicas()
+    control = _ControlTrabajador(ia, id_busqueda, limite_nodos)
+    ia.cancelacion = control
+    ia.nodos = 0
+    ia.cortes = 0
+    ia.fin = fin
+    # El límite de nodos lo comprueba control, sumando los de todos los procesos
+    ia.limite_nodos = None
+    ia.profundidad_actual = profundidad
+    if control.cancelada():
+        return None
+    
+    tablero = clase_tablero.desde_fen(fen)
+    tablero.realizar_movimiento(movimiento)
+    while True:
+        # Con alfa = cota - 1 un movimiento que iguala la mejor cota también
+        # obtiene su valor exacto, de modo que los empates se resuelven por
+        # orden como en serie
+        control.umbral = _alfa_compartido.value
+        alfa = control.umbral - 1
+        try:
+            valor = ia.minimax(tablero, profundidad - 1, alfa, alfa + 1, False, movimiento)
+            if valor > alfa:
+                valor = ia.minimax(tablero, profundidad - 1, alfa, float('inf'), False, movimiento)
+            break
+        except BusquedaInterrumpida:
+            if control.cancelada() or (fin is not None and time.time() >= fin):
+                return None
+    control.contar_nodos()
+    if valor > alfa:
+        with _alfa_compartido.get_lock():
+            if valor > _alfa_compartido.value:
+                _alfa_compartido.value = valor
+    return valor, ia.cortes
+
 
 class IA:
-    def __init__(self, color, profundidad=4):
+    # Cada cuántos nodos se consulta el reloj
+    INTERVALO_RELOJ = 64
+    # Segundos entre comprobaciones de cancelación mientras se espera a los trabajadores
+    ESPERA_TRABAJADORES = 0.05
+
+    def __init__(self, color, profundidad=4, memoria_tt_mb=16, tiempo_limite=None, limite_nodos=None,
+                 evaluador='incremental', procesos=1, libro=None, finales=None):
         """
         Constructor de la clase IA (Inteligencia Artificial).
         :param color: El color de la IA (BLANCO o NEGRO).
         :param profundidad: La profundidad máxima para la búsqueda Minimax.
+        :param memoria_tt_mb: Memoria máxima de la tabla de transposición, en MB.
+        :param tiempo_limite: Segundos disponibles por jugada (None para no limitar).
+        :param limite_nodos: Nodos disponibles por jugada (None para no limitar).
+        :param evaluador: 'incremental' usa los totales que mantiene el tablero;
+                          'completo' recorre todas las casillas (evaluar_tablero).
+        :param procesos: Con más de un proceso, los movimientos raíz se reparten
+                         entre procesos trabajadores (ver buscar_raiz_paralela).
+                         Experimental: en una máquina de un solo núcleo,
+                         benchmark.py tarda 1,6 veces más con dos procesos y
+                         1,8 con cuatro; con varios núcleos aún no se ha
+                         medido, así que por defecto se usa uno.
+        :param libro: Ruta de un libro de aperturas (ver libro.py) que se consulta
+                      antes de buscar; None para no usar libro.
+        :param finales: Directorio de tablas de finales (ver finales.py) que se
+                        consultan en la raíz y en las hojas; None para no usarlas.
         """
         self.color = color
         self.profundidad = profundidad
+        self.tiempo_limite = tiempo_limite
+        self.limite_nodos = limite_nodos
+        self.memoria_tt_mb = memoria_tt_mb
+        self.evaluador = evaluador
+        self.procesos = procesos
+        self.tabla_transposicion = TablaTransposicion(memoria_tt_mb)
+        # Estructura de peones de cada tablero, desde el punto de vista de las blancas
+        self.tabla_peones = TablaPeones()
+        self.libro = LibroAperturas(libro) if libro else None
+        self.directorio_finales = finales
+        self.finales = TablasFinales(finales) if finales else None
+        self._trabajadores = None
+        self._alfa_compartido = None
+        self._busqueda_compartida = None
+        self._nodos_compartidos = None
+        # Identificador de la búsqueda en curso, compartido con los trabajadores
+        self.id_busqueda = 0
+        # Estadísticas de la última búsqueda
+        self.nodos = 0
+        self.cortes = 0
+        self.fin = None
+        self.cancelacion = None
+        # Heurísticas de ordenación: dos killers por ply e historial por (tablero, origen, destino)
+        self.killers = [[None, None] for _ in range(MAXIMO_PLY)]
+        self.historial = [0] * (2 * 64 * 64)
+        self.profundidad_actual = 0
         # Tablas de posición para evaluar la ubicación de las piezas
-        self.tablas_posicion = {
-            Pieza.PEON: [
-                [0,  0,  0,  0,  0,  0,  0,  0],
-                [50, 50, 50, 50, 50, 50, 50, 50],
-                [10, 10, 20, 30, 30, 20, 10, 10],
-                [5,  5, 10, 25, 25, 10,  5,  5],
-                [0,  0,  0, 20, 20,  0,  0,  0],
-                [5, -5,-10,  0,  0,-10, -5,  5],
-                [5, 10, 10,-20,-20, 10, 10,  5],
-                [0,  0,  0,  0,  0,  0,  0,  0]
-            ],
-            Pieza.CABALLO: [
-                [-50,-40,-30,-30,-30,-30,-40,-50],
-                [-40,-20,  0,  0,  0,  0,-20,-40],
-                [-30,  0, 10, 15, 15, 10,  0,-30],
-                [-30,  5, 15, 20, 20, 15,  5,-30],
-                [-30,  0, 15, 20, 20, 15,  0,-30],
-                [-30,  5, 10, 15, 15, 10,  5,-30],
-                [-40,-20,  0,  5,  5,  0,-20,-40],
-                [-50,-40,-30,-30,-30,-30,-40,-50]
-            ],
-            Pieza.ALFIL: [
-                [-20,-10,-10,-10,-10,-10,-10,-20],
-                [-10,  0,  0,  0,  0,  0,  0,-10],
-                [-10,  0,  5, 10, 10,  5,  0,-10],
-                [-10,  5,  5, 10, 10,  5,  5,-10],
-                [-10,  0, 10, 10, 10, 10,  0,-10],
-                [-10, 10, 10, 10, 10, 10, 10,-10],
-                [-10,  5,  0,  0,  0,  0,  5,-10],
-                [-20,-10,-10,-10,-10,-10,-10,-20]
-            ],
-            Pieza.TORRE: [
-                [0,  0,  0,  0,  0,  0,  0,  0],
-                [5, 10, 10, 10, 10, 10, 10,  5],
-                [-5,  0,  0,  0,  0,  0,  0, -5],
-                [-5,  0,  0,  0,  0,  0,  0, -5],
-                [-5,  0,  0,  0,  0,  0,  0, -5],
-                [-5,  0,  0,  0,  0,  0,  0, -5],
-                [-5,  0,  0,  0,  0,  0,  0, -5],
-                [0,  0,  0,  5,  5,  0,  0,  0]
-            ],
-            Pieza.DAMA: [
-                [-20,-10,-10, -5, -5,-10,-10,-20],
-                [-10,  0,  0,  0,  0,  0,  0,-10],
-                [-10,  0,  5,  5,  5,  5,  0,-10],
-                [-5,  0,  5,  5,  5,  5,  0, -5],
-                [0,  0,  5,  5,  5,  5,  0, -5],
-                [-10,  5,  5,  5,  5,  5,  0,-10],
-                [-10,  0,  5,  0,  0,  0,  0,-10],
-                [-20,-10,-10, -5, -5,-10,-10,-20]
-            ],
-            Pieza.REY: [
-                [-30,-40,-40,-50,-50,-40,-40,-30],
-                [-30,-40,-40,-50,-50,-40,-40,-30],
-                [-30,-40,-40,-50,-50,-40,-40,-30],
-                [-30,-40,-40,-50,-50,-40,-40,-30],
-                [-20,-30,-30,-40,-40,-30,-30,-20],
-                [-10,-20,-20,-20,-20,-20,-20,-10],
-                [20, 20,  0,  0,  0,  0, 20, 20],
-                [20, 30, 10,  0,  0, 10, 30, 20]
-            ]
-        }
+        self.tablas_posicion = TABLAS_POSICION
+        
+        if evaluador == 'incremental':
+            self.evaluar = self.evaluar_incremental
+        elif evaluador == 'completo':
+            self.evaluar = self.evaluar_tablero
+        else:
+            raise ValueError(f"Evaluador desconocido: {evaluador}")
 
     def evaluar_tablero(self, tablero):
         """
@@ -80,20 +210,12 @@ class IA:
         :return: Un valor numérico que representa la calidad del tablero desde la perspectiva de la IA.
         """
         valor = 0
-        # Valores de las piezas (aproximados por su poder relativo)
-        valores_piezas = {
-            Pieza.PEON: 100,
-            Pieza.CABALLO: 320,
-            Pieza.ALFIL: 330,
-            Pieza.TORRE: 500,
-            Pieza.DAMA: 900,
-            Pieza.REY: 20000
-        }
+        valores_piezas = VALORES_PIEZAS
         
         # Evaluación del material y la posición de las piezas en el tablero
         for tablero_num in [1, 2]:  # Iterar por ambos tableros (uno para cada jugador)
-            for fila in range(8):  # Iterar sobre las filas
-                for columna in range(8):  # Iterar sobre las columnas
+            for color in Color:  # Solo las casillas ocupadas de cada color
+                for fila, columna in tablero.casillas_ocupadas(tablero_num, color):
                     pieza = tablero.obtener_pieza(tablero_num, fila, columna)  # Obtener la pieza en la posición
                     if pieza:
                         valor_base = valores_piezas[pieza[0]]  # Obtener el valor base de la pieza
@@ -126,107 +248,510 @@ class IA:
                             if not peones_adyacentes:
                                 valor -= 30 * multiplicador
 
-        # Evaluar la seguridad del rey
-        for tablero_num in [1, 2]:
-            rey_encontrado = False
-            for fila in range(8):
-                for columna in range(8):
-                    pieza = tablero.obtener_pieza(tablero_num, fila, columna)
-                    if pieza and pieza[0] == Pieza.REY and pieza[1] == self.color:
-                        rey_encontrado = True
-                        # Penalizar si el rey está en jaque
-                        if tablero.esta_en_jaque(fila, columna, tablero_num):
-                            valor -= 100
-                        break
-                if rey_encontrado:
-                    break
+        # Evaluar la seguridad del rey: penalizar si el rey está en jaque
+        if tablero.rey_en_jaque(self.color):
+            valor -= 100
                     
         return valor
 
+    def evaluar_incremental(self, tablero):
+        """
+        Evaluación equivalente a evaluar_tablero que usa los totales de material,
+        posición y peones por columna que el tablero mantiene al mover. La
+        estructura de peones se toma de la caché por clave de peones cuando es
+        posible y el rey se localiza con la posición que guarda el tablero.
+        """
+        propio = self.color.value
+        rival = 1 - propio
+        valor = (tablero.material[propio] - tablero.material[rival] +
+                 tablero.posicional[propio] - tablero.posicional[rival])
+        
+        tabla_peones = self.tabla_peones
+        for tablero_num in [1, 2]:
+            clave = tablero.hash_peones[tablero_num]
+            valor_peones = tabla_peones.buscar(clave)
+            if valor_peones is None:
+                columnas = tablero.peones_columna[tablero_num]
+                valor_peones = (self.evaluar_peones(columnas[Color.BLANCO.value]) -
+                                self.evaluar_peones(columnas[Color.NEGRO.value]))
+                tabla_peones.guardar(clave, valor_peones)
+            valor += valor_peones if self.color == Color.BLANCO else -valor_peones
+        
+        # Evaluar la seguridad del rey
+        if tablero.rey_en_jaque(self.color):
+            valor -= 100
+        return valor
+
+    def evaluar_peones(self, columnas):
+        """
+        Penalizaciones por peones doblados y aislados de un color en un tablero.
+        :param columnas: Número de peones en cada columna.
+        """
+        valor = 0
+        for columna, peones in enumerate(columnas):
+            if peones:
+                if peones > 1:
+                    valor -= 20 * peones
+                if ((columna == 0 or not columnas[columna - 1]) and
+                        (columna == 7 or not columnas[columna + 1])):
+                    valor -= 30 * peones
+        return valor
+
     def minimax(self, tablero, profundidad, alfa, beta, es_maximizador, movimiento_anterior=None):
+        # Comprobar los límites de la búsqueda
+        self.nodos += 1
+        if self.limite_nodos is not None and self.nodos > self.limite_nodos:
+            raise BusquedaInterrumpida()
+        if self.nodos % self.INTERVALO_RELOJ == 0:
+            if self.fin is not None and time.time() >= self.fin:
+                raise BusquedaInterrumpida()
+            if self.cancelacion is not None and self.cancelacion.is_set():
+                raise BusquedaInterrumpida()
+        
         # Verificación de estado terminal
         if profundidad == 0:
-            return self.evaluar_tablero(tablero)
+            if self.finales is not None:
+                valor = self.valor_final(tablero)
+                if valor is not None:
+                    return valor
+            return self.evaluar(tablero)
         
-        # Ordenar movimientos para mejorar la poda
-        movimientos = self.obtener_todos_movimientos(tablero, 
-                     self.color if es_maximizador else 
-                     (Color.NEGRO if self.color == Color.BLANCO else Color.BLANCO))
+        # Consultar la tabla de transposición
+        alfa_original, beta_original = alfa, beta
+        movimiento_tt = None
+        entrada = self.tabla_transposicion.buscar(tablero.hash)
+        if entrada:
+            movimiento_tt = entrada[4]
+            if entrada[1] >= profundidad:
+                valor, tipo = entrada[2], entrada[3]
+                if tipo == EXACTO:
+                    return valor
+                if tipo == COTA_INFERIOR and valor >= beta:
+                    return valor
+                if tipo == COTA_SUPERIOR and valor <= alfa:
+                    return valor
         
-        # Ordenar movimientos (capturas primero)
-        movimientos = self.ordenar_movimientos(tablero, movimientos)
+        # Generar los movimientos por etapas, ya ordenados para mejorar la poda:
+        # el de la tabla de transposición, capturas, killers e historial
+        ply = self.profundidad_actual - profundidad
+        color = self.color if es_maximizador else (Color.NEGRO if self.color == Color.BLANCO else Color.BLANCO)
+        movimientos = self.generar_movimientos(tablero, color, movimiento_tt, ply)
         
+        mejor_movimiento = None
+        hay_movimientos = False
         if es_maximizador:
             mejor_valor = float('-inf')
             for movimiento in movimientos:
-                tablero_temp = tablero.copiar_tablero()
-                if tablero_temp.realizar_movimiento(movimiento):
-                    valor = self.minimax(tablero_temp, profundidad - 1, alfa, beta, False, movimiento)
-                    mejor_valor = max(mejor_valor, valor)
+                registro = tablero.realizar_movimiento(movimiento)
+                if registro:
+                    hay_movimientos = True
+                    try:
+                        valor = self.minimax(tablero, profundidad - 1, alfa, beta, False, movimiento)
+                    finally:
+                        tablero.deshacer_movimiento(registro)
+                    if valor > mejor_valor:
+                        mejor_valor = valor
+                        mejor_movimiento = movimiento
                     alfa = max(alfa, mejor_valor)
                     if beta <= alfa:
+                        self.cortes += 1
+                        self.registrar_corte(tablero, movimiento, profundidad, ply)
                         break  # Poda beta
-            return mejor_valor
         else:
             mejor_valor = float('inf')
             for movimiento in movimientos:
-                tablero_temp = tablero.copiar_tablero()
-                if tablero_temp.realizar_movimiento(movimiento):
-                    valor = self.minimax(tablero_temp, profundidad - 1, alfa, beta, True, movimiento)
-                    mejor_valor = min(mejor_valor, valor)
+                registro = tablero.realizar_movimiento(movimiento)
+                if registro:
+                    hay_movimientos = True
+                    try:
+                        valor = self.minimax(tablero, profundidad - 1, alfa, beta, True, movimiento)
+                    finally:
+                        tablero.deshacer_movimiento(registro)
+                    if valor < mejor_valor:
+                        mejor_valor = valor
+                        mejor_movimiento = movimiento
                     beta = min(beta, mejor_valor)
                     if beta <= alfa:
+                        self.cortes += 1
+                        self.registrar_corte(tablero, movimiento, profundidad, ply)
                         break  # Poda alfa
-            return mejor_valor
+        
+        if not hay_movimientos and not self.sin_movimientos_pierde(tablero, color):
+            # Sin movimientos legales, con el rey a salvo, la partida es tablas
+            # (como en autojuego.py y en las tablas de finales)
+            mejor_valor = 0
+        
+        # Guardar el resultado indicando si es exacto o una cota
+        if mejor_valor <= alfa_original:
+            tipo = COTA_SUPERIOR
+        elif mejor_valor >= beta_original:
+            tipo = COTA_INFERIOR
+        else:
+            tipo = EXACTO
+        self.tabla_transposicion.guardar(tablero.hash, profundidad, mejor_valor, tipo, mejor_movimiento)
+        return mejor_valor
 
-    def ordenar_movimientos(self, tablero, movimientos):
-        """Ordena los movimientos para mejorar la eficiencia de la poda"""
-        movimientos_valorados = []
+    def ordenar_movimientos(self, tablero, movimientos, movimiento_tt=None, ply=None):
+        """
+        Ordena los movimientos para mejorar la eficiencia de la poda. Cada
+        movimiento recibe una puntuación entera: primero el movimiento de la
+        tabla de transposición, después las capturas por MVV-LVA, los dos
+        killers del ply y el resto según el historial y la cercanía al centro.
+        """
+        killers = self.killers[ply] if ply is not None and ply < MAXIMO_PLY else (None, None)
+        historial = self.historial
+        obtener_pieza = tablero.obtener_pieza
+        puntos = []
         for mov in movimientos:
-            valor = 0
-            # Priorizar capturas
-            pieza_destino = tablero.obtener_pieza(mov[0], mov[2][0], mov[2][1])
+            tablero_num, (desde_fila, desde_col), (hasta_fila, hasta_col) = mov
+            pieza_destino = obtener_pieza(tablero_num, hasta_fila, hasta_col)
             if pieza_destino:
-                valor += 10
-            # Priorizar movimientos al centro
-            centro_fila = abs(3.5 - mov[2][0])
-            centro_col = abs(3.5 - mov[2][1])
-            valor += (7 - (centro_fila + centro_col)) / 2
-            movimientos_valorados.append((mov, valor))
+                atacante = obtener_pieza(tablero_num, desde_fila, desde_col)
+                puntos.append(PUNTOS_CAPTURA + MVV_LVA[pieza_destino[0].value][atacante[0].value])
+            elif mov == killers[0]:
+                puntos.append(PUNTOS_KILLER[0])
+            elif mov == killers[1]:
+                puntos.append(PUNTOS_KILLER[1])
+            else:
+                indice = ((tablero_num - 1) * 64 + desde_fila * 8 + desde_col) * 64 + hasta_fila * 8 + hasta_col
+                puntos.append((historial[indice] << 4) + CENTRO[hasta_fila][hasta_col])
+        if movimiento_tt is not None:
+            for i, mov in enumerate(movimientos):
+                if mov == movimiento_tt:
+                    puntos[i] = PUNTOS_CAPTURA << 1
+                    break
+        # La ordenación es estable: a igual puntuación se conserva el orden de generación
+        orden = sorted(range(len(movimientos)), key=puntos.__getitem__, reverse=True)
+        return [movimientos[i] for i in orden]
+
+    def generar_movimientos(self, tablero, color, movimiento_tt=None, ply=None):
+        """
+        Generador por etapas con el mismo orden que ordenar_movimientos: el
+        movimiento de la tabla de transposición, las capturas por MVV-LVA, los
+        killers del ply y los movimientos tranquilos por historial. Cada etapa
+        se genera solo cuando se agota la anterior, de modo que tras una poda
+        temprana no se generan los movimientos tranquilos.
+        """
+        obtener_pieza = tablero.obtener_pieza
+        # Jaques y clavadas se calculan una vez; cada etapa filtra con ellos
+        analisis = tablero.analizar_rey(color)
+        es_legal = tablero.es_movimiento_legal
         
-        return [x[0] for x in sorted(movimientos_valorados, key=lambda x: x[1], reverse=True)]
+        # Movimiento de la tabla de transposición, si es válido en esta posición
+        if movimiento_tt is not None and self.es_movimiento_valido(tablero, movimiento_tt, color, analisis):
+            yield movimiento_tt
+        else:
+            movimiento_tt = None
+        
+        # Capturas
+        capturas = []
+        puntos = []
+        for tablero_num in [1, 2]:
+            for pos in tablero.casillas_ocupadas(tablero_num, color):
+                atacante = obtener_pieza(tablero_num, pos[0], pos[1])[0]
+                for destino in tablero.capturas_pieza(atacante, pos, tablero_num):
+                    mov = (tablero_num, pos, destino)
+                    if es_legal(mov, analisis):
+                        victima = obtener_pieza(tablero_num, destino[0], destino[1])[0]
+                        capturas.append(mov)
+                        puntos.append(MVV_LVA[victima.value][atacante.value])
+        for i in sorted(range(len(capturas)), key=puntos.__getitem__, reverse=True):
+            if capturas[i] != movimiento_tt:
+                yield capturas[i]
+        
+        # Killers: solo si en esta posición son movimientos tranquilos válidos
+        jugados = [movimiento_tt]
+        if ply is not None and ply < MAXIMO_PLY:
+            for killer in self.killers[ply]:
+                if (killer is not None and killer not in jugados and
+                        obtener_pieza(killer[0], killer[2][0], killer[2][1]) is None and
+                        self.es_movimiento_valido(tablero, killer, color, analisis)):
+                    jugados.append(killer)
+                    yield killer
+        
+        # Movimientos tranquilos
+        historial = self.historial
+        tranquilos = []
+        puntos = []
+        for tablero_num in [1, 2]:
+            for desde_fila, desde_col in tablero.casillas_ocupadas(tablero_num, color):
+                pieza = obtener_pieza(tablero_num, desde_fila, desde_col)
+                base = ((tablero_num - 1) * 64 + desde_fila * 8 + desde_col) * 64
+                for hasta_fila, hasta_col in tablero.movimientos_pieza(pieza[0], (desde_fila, desde_col), tablero_num):
+                    if obtener_pieza(tablero_num, hasta_fila, hasta_col) is None:
+                        mov = (tablero_num, (desde_fila, desde_col), (hasta_fila, hasta_col))
+                        if mov not in jugados and es_legal(mov, analisis):
+                            tranquilos.append(mov)
+                            puntos.append((historial[base + hasta_fila * 8 + hasta_col] << 4) +
+                                          CENTRO[hasta_fila][hasta_col])
+        for i in sorted(range(len(tranquilos)), key=puntos.__getitem__, reverse=True):
+            yield tranquilos[i]
+
+    def es_movimiento_valido(self, tablero, movimiento, color, analisis):
+        """Comprueba que un movimiento guardado (TT o killer) sea legal en esta posición"""
+        tablero_num, desde, hasta = movimiento
+        pieza = tablero.obtener_pieza(tablero_num, desde[0], desde[1])
+        return (pieza is not None and pieza[1] == color and
+                hasta in tablero.movimientos_pieza(pieza[0], desde, tablero_num) and
+                tablero.es_movimiento_legal(movimiento, analisis))
+
+    def registrar_corte(self, tablero, movimiento, profundidad, ply):
+        """Actualiza killers e historial cuando un movimiento tranquilo produce una poda"""
+        tablero_num, (desde_fila, desde_col), (hasta_fila, hasta_col) = movimiento
+        if tablero.obtener_pieza(tablero_num, hasta_fila, hasta_col):
+            return
+        if ply < MAXIMO_PLY:
+            killers = self.killers[ply]
+            if killers[0] != movimiento:
+                killers[1] = killers[0]
+                killers[0] = movimiento
+        indice = ((tablero_num - 1) * 64 + desde_fila * 8 + desde_col) * 64 + hasta_fila * 8 + hasta_col
+        self.historial[indice] += profundidad * profundidad
+        if self.historial[indice] >= MAXIMO_HISTORIAL:
+            self.historial = [valor >> 1 for valor in self.historial]
+
+    def obtener_mejor_movimiento(self, tablero, cancelacion=None):
+        """
+        Busca el mejor movimiento con profundización iterativa: se completa la
+        búsqueda a profundidad 1, 2, ... hasta self.profundidad o hasta agotar
+        el tiempo o los nodos disponibles, y se devuelve el mejor movimiento de
+        la última iteración completa.
+        :param cancelacion: threading.Event opcional; si otro hilo lo activa,
+                            la búsqueda termina como si se agotara el tiempo.
+        """
+        # La búsqueda realiza y deshace movimientos sobre una única copia del tablero
+        tablero = tablero.copiar_tablero()
+        self.nodos = 0
+        self.cortes = 0
+        self.fin = time.time() + self.tiempo_limite if self.tiempo_limite is not None else None
+        self.cancelacion = cancelacion
+        self.id_busqueda += 1
+        self.preparar_heuristicas()
+        
+        movimientos = self.obtener_todos_movimientos(tablero, self.color)
+        # Las posiciones del libro de aperturas no se buscan
+        if self.libro is not None:
+            movimiento = self.libro.elegir(tablero, movimientos)
+            if movimiento is not None:
+                return movimiento
+        # Tampoco las que cubren las tablas de finales
+        if self.finales is not None:
+            movimiento = self.elegir_movimiento_final(tablero, movimientos)
+            if movimiento is not None:
+                return movimiento
+        movimientos = self.ordenar_movimientos(tablero, movimientos)
+        # Si ninguna iteración llega a completarse se juega el primer movimiento ordenado
+        mejor_movimiento = movimientos[0] if movimientos else None
+        
+        buscar = self.buscar_raiz_paralela if self.procesos > 1 else self.buscar_raiz
+        for profundidad in range(1, self.profundidad + 1):
+            try:
+                _, movimiento = buscar(tablero, movimientos, profundidad)
+            except BusquedaInterrumpida:
+                break
+            if movimiento is None:
+                break
+            mejor_movimiento = movimiento
+            # El mejor movimiento de esta iteración se busca primero en la siguiente
+            movimientos.remove(movimiento)
+            movimientos.insert(0, movimiento)
+        return mejor_movimiento
+
+    def preparar_heuristicas(self):
+        """
+        Estado de ordenación al empezar una búsqueda: entradas de la tabla de
+        transposición marcadas como anteriores, killers vacíos e historial
+        conservado pero con menos peso.
+        """
+        self.tabla_transposicion.nueva_busqueda()
+        self.killers = [[None, None] for _ in range(MAXIMO_PLY)]
+        self.historial = [valor >> 2 for valor in self.historial]
+
+    def sin_movimientos_pierde(self, tablero, color):
+        """Un bando sin movimientos legales pierde si ya no tiene rey o está en jaque; si no, son tablas"""
+        return tablero.reyes[color.value] is None or tablero.rey_en_jaque(color)
+
+    def valor_final(self, tablero):
+        """
+        Valor de la posición según las tablas de finales, desde la perspectiva
+        de self.color: VALOR_FINAL menos las jugadas hasta el final si se gana,
+        su opuesto si se pierde y 0 en tablas.
+        :return: El valor, o None si la posición no está en las tablas.
+        """
+        jugadas = self.finales.consultar(tablero)
+        if jugadas is None:
+            return None
+        if jugadas == 0:
+            return 0
+        valor = VALOR_FINAL - abs(jugadas) if jugadas > 0 else abs(jugadas) - VALOR_FINAL
+        return valor if tablero.turno == self.color else -valor
 
-    def obtener_mejor_movimiento(self, tablero):
+    def elegir_movimiento_final(self, tablero, movimientos):
+        """
+        Elige con las tablas de finales el movimiento que gana más rápido,
+        o el que empata, o el que más tarda en perder.
+        :return: Un movimiento o None si la posición no está en las tablas.
+        """
+        if self.finales.consultar(tablero) is None:
+            return None
+        mejor_movimiento = None
+        mejor_clave = None
+        for movimiento in movimientos:
+            registro = tablero.realizar_movimiento(movimiento)
+            victoria = tablero.verificar_victoria()
+            if victoria:
+                jugadas = 1 if victoria[0] == self.color else -1
+            else:
+                # Jugadas para el rival, que ahora mueve
+                rival = self.finales.consultar(tablero)
+                if rival is None or rival == 0:
+                    jugadas = rival
+                elif rival < 0:
+                    jugadas = 1 - rival
+                else:
+                    jugadas = -(rival + 1)
+            tablero.deshacer_movimiento(registro)
+            if jugadas is None:
+                continue
+            # Primero ganar cuanto antes, después empatar y por último perder cuanto más tarde
+            clave = (2, -jugadas) if jugadas > 0 else (1, 0) if jugadas == 0 else (0, -jugadas)
+            if mejor_clave is None or clave > mejor_clave:
+                mejor_clave = clave
+                mejor_movimiento = movimiento
+        return mejor_movimiento
+
+    def buscar_raiz(self, tablero, movimientos, profundidad):
+        """
+        Busca los movimientos de la raíz a la profundidad indicada.
+        :return: Una tupla (mejor valor, mejor movimiento).
+        """
         mejor_movimiento = None
         mejor_valor = float('-inf')
         alfa = float('-inf')
         beta = float('inf')
-        
-        movimientos = self.obtener_todos_movimientos(tablero, self.color)
-        movimientos = self.ordenar_movimientos(tablero, movimientos)
+        self.profundidad_actual = profundidad
         
         for movimiento in movimientos:
-            tablero_temp = tablero.copiar_tablero()
-            if tablero_temp.realizar_movimiento(movimiento):
-                valor = self.minimax(tablero_temp, self.profundidad - 1, alfa, beta, False, movimiento)
+            registro = tablero.realizar_movimiento(movimiento)
+            if registro:
+                try:
+                    valor = self.minimax(tablero, profundidad - 1, alfa, beta, False, movimiento)
+                finally:
+                    tablero.deshacer_movimiento(registro)
                 if valor > mejor_valor:
                     mejor_valor = valor
                     mejor_movimiento = movimiento
                 alfa = max(alfa, mejor_valor)
-        print(mejor_movimiento)
-        return mejor_movimiento
+        return mejor_valor, mejor_movimiento
+
+    def buscar_raiz_paralela(self, tablero, movimientos, profundidad):
+        """
+        Igual que buscar_raiz, pero repartiendo los movimientos entre procesos.
+        El primer movimiento (el mejor de la iteración anterior) se busca aquí
+        para obtener una cota alfa; el resto se envía a los trabajadores como
+        FEN. Cada trabajador comprueba con una ventana nula si su movimiento
+        alcanza la mejor cota compartida y solo entonces calcula su valor
+        exacto (ver _buscar_movimiento_raiz), así que el mejor valor es el de
+        la búsqueda en serie y los empates se resuelven por el orden de los
+        movimientos, también como en serie. Cada proceso tiene su propia tabla
+        de transposición; una entrada más profunda que llega por transposición
+        desde otro movimiento raíz puede dar un valor distinto, igual que
+        ocurre en serie con otro orden de movimientos.
+        El tiempo y el límite de nodos son los de toda la búsqueda: los
+        trabajadores suman sus nodos en un contador compartido. La cancelación
+        y el tiempo se comprueban también mientras se espera a los
+        trabajadores, que dejan de buscar en cuanto la búsqueda se interrumpe.
+        """
+        if profundidad < 2 or len(movimientos) < 2:
+            return self.buscar_raiz(tablero, movimientos, profundidad)
+        
+        mejor_valor, mejor_movimiento = self.buscar_raiz(tablero, movimientos[:1], profundidad)
+        trabajadores = self._obtener_trabajadores()
+        self._alfa_compartido.value = mejor_valor
+        # Los trabajadores siguen contando desde los nodos ya buscados en esta jugada
+        self._nodos_compartidos.value = self.nodos
+        
+        fen = tablero.a_fen()
+        configuracion = (self.color, self.evaluador, self.memoria_tt_mb, self.directorio_finales)
+        self._busqueda_compartida.value = self.id_busqueda
+        futuros = [
+            trabajadores.submit(_buscar_movimiento_raiz, type(tablero), fen, configuracion,
+                                movimiento, profundidad, self.fin, self.limite_nodos, self.id_busqueda)
+            for movimiento in movimientos[1:]
+        ]
+        try:
+            pendientes = set(futuros)
+            while pendientes:
+                if self.cancelacion is not None and self.cancelacion.is_set():
+                    raise BusquedaInterrumpida()
+                if self.fin is not None and time.time() >= self.fin:
+                    raise BusquedaInterrumpida()
+                terminados, pendientes = wait(pendientes, timeout=self.ESPERA_TRABAJADORES,
+                                              return_when=FIRST_COMPLETED)
+                # Una tarea interrumpida (nodos agotados) interrumpe toda la búsqueda
+                if any(futuro.result() is None for futuro in terminados):
+                    raise BusquedaInterrumpida()
+            # Los resultados se recorren en el orden de los movimientos para desempatar igual que en serie
+            for movimiento, futuro in zip(movimientos[1:], futuros):
+                resultado = futuro.result()
+                if resultado is None:
+                    raise BusquedaInterrumpida()
+                valor, cortes = resultado
+                self.cortes += cortes
+                # En caso de empate gana el movimiento anterior en el orden
+                if valor > mejor_valor:
+                    mejor_valor = valor
+                    mejor_movimiento = movimiento
+        finally:
+            for futuro in futuros:
+                futuro.cancel()
+            # Las tareas que sigan en marcha ven la búsqueda cancelada y terminan
+            self._busqueda_compartida.value = 0
+            self.nodos = self._nodos_compartidos.value
+        return mejor_valor, mejor_movimiento
+
+    def _obtener_trabajadores(self):
+        """Crea el grupo de procesos la primera vez que se necesita"""
+        if self._trabajadores is None:
+            self._alfa_compartido = multiprocessing.Value('d', float('-inf'))
+            self._busqueda_compartida = multiprocessing.Value('q', 0)
+            self._nodos_compartidos = multiprocessing.Value('q', 0)
+            self._trabajadores = ProcessPoolExecutor(max_workers=self.procesos,
+                                                     initializer=_inicializar_trabajador,
+                                                     initargs=(self._alfa_compartido, self._busqueda_compartida,
+                                                               self._nodos_compartidos))
+        return self._trabajadores
+
+    def cerrar(self):
+        """
+        Termina los procesos trabajadores de la búsqueda paralela, si los hay,
+        y cierra el libro y las tablas de finales
+        """
+        if self.libro is not None:
+            self.libro.cerrar()
+        if self.finales is not None:
+            self.finales.cerrar()
+        if self._trabajadores is not None:
+            self._trabajadores.shutdown(cancel_futures=True)
+            self._trabajadores = None
+            self._alfa_compartido = None
+            self._busqueda_compartida = None
+            self._nodos_compartidos = None
 
     def obtener_todos_movimientos(self, tablero, color):
         """
-        Obtiene todos los movimientos posibles para un color dado
+        Obtiene todos los movimientos legales para un color dado: los que no
+        dejan a su rey atacado (ver TableroAlice.es_movimiento_legal)
         """
         movimientos = []
+        analisis = tablero.analizar_rey(color)
         for tablero_num in [1, 2]:
-            for fila in range(8):
-                for columna in range(8):
-                    pieza = tablero.obtener_pieza(tablero_num, fila, columna)
-                    if pieza and pieza[1] == color:
-                        movs = tablero.movimientos_pieza(pieza[0], (fila, columna), tablero_num)
-                        for mov in movs:
-                            movimientos.append((tablero_num, (fila, columna), mov))
+            # Solo se visitan las casillas ocupadas por el color
+            for fila, columna in tablero.casillas_ocupadas(tablero_num, color):
+                pieza = tablero.obtener_pieza(tablero_num, fila, columna)
+                movs = tablero.movimientos_pieza(pieza[0], (fila, columna), tablero_num)
+                for mov in movs:
+                    movimiento = (tablero_num, (fila, columna), mov)
+                    if tablero.es_movimiento_legal(movimiento, analisis):
+                        movimientos.append(movimiento)
         return movimientos
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""
+Preprocesado de las imágenes de la interfaz. Genera, a partir de los PNG de
+las piezas y de imagenes/alice.jpg:
+    imagenes/atlas_<tamaño>.png          las doce piezas ya escaladas en una
+                                         sola imagen (fila 0 blancas, fila 1
+                                         negras, columnas en el orden de Pieza)
+    imagenes/fondo_<ancho>x<alto>.jpg    el fondo ya escalado a la ventana
+
+interfaz.py los carga si existen para el tamaño actual y, si no, usa las
+imágenes originales.
+
+Uso:
+    python atlas.py --tamano 60 --ancho 1450 --alto 600
+"""
+import argparse
+import os
+import sys
+
+import pygame
+
+from constantes import Pieza, Color
+
+
+DIRECTORIO = 'imagenes'
+NOMBRES_PIEZAS = {
+    Pieza.PEON: 'peon',
+    Pieza.TORRE: 'torre',
+    Pieza.ALFIL: 'alfil',
+    Pieza.CABALLO: 'caballo',
+    Pieza.DAMA: 'dama',
+    Pieza.REY: 'rey'
+}
+NOMBRES_COLORES = {
+    Color.BLANCO: 'blanco',
+    Color.NEGRO: 'negro'
+}
+FONDO = os.path.join(DIRECTORIO, 'alice.jpg')
+
+
+def ruta_pieza(pieza, color):
+    """Imagen original de una pieza"""
+    return os.path.join(DIRECTORIO, f'{NOMBRES_PIEZAS[pieza]}_{NOMBRES_COLORES[color]}.png')
+
+
+def ruta_atlas(tamano):
+    return os.path.join(DIRECTORIO, f'atlas_{tamano}.png')
+
+
+def ruta_fondo(ancho, alto):
+    return os.path.join(DIRECTORIO, f'fondo_{ancho}x{alto}.jpg')
+
+
+def rectangulos_atlas(tamano):
+    """Devuelve {(pieza, color): pygame.Rect} con la zona de cada pieza dentro del atlas"""
+    return {(pieza, color): pygame.Rect(columna * tamano, fila * tamano, tamano, tamano)
+            for fila, color in enumerate(Color) for columna, pieza in enumerate(Pieza)}
+
+
+def construir_atlas(tamano):
+    """
+    Escala las doce piezas al tamaño de casilla y las reúne en una superficie.
+    Las que no se pueden leer quedan transparentes.
+    """
+    atlas = pygame.Surface((len(Pieza) * tamano, len(Color) * tamano), pygame.SRCALPHA)
+    for (pieza, color), rect in rectangulos_atlas(tamano).items():
+        try:
+            imagen = pygame.image.load(ruta_pieza(pieza, color))
+        except Exception as e:
+            print(f"Error cargando {ruta_pieza(pieza, color)}: {e}")
+            continue
+        # Copiar los píxeles con su transparencia, sin mezclarlos con el fondo vacío
+        atlas.blit(pygame.transform.scale(imagen, (tamano, tamano)), rect, special_flags=pygame.BLEND_RGBA_MAX)
+    return atlas
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Preprocesa las imágenes de la interfaz")
+    parser.add_argument('--tamano', type=int, default=60, help="Tamaño de casilla en píxeles")
+    parser.add_argument('--ancho', type=int, default=1450, help="Ancho de la ventana")
+    parser.add_argument('--alto', type=int, default=600, help="Alto de la ventana")
+    args = parser.parse_args(argumentos)
+
+    pygame.image.save(construir_atlas(args.tamano), ruta_atlas(args.tamano))
+    print(f"Atlas escrito en {ruta_atlas(args.tamano)}")
+    fondo = pygame.transform.scale(pygame.image.load(FONDO), (args.ancho, args.alto))
+    pygame.image.save(fondo, ruta_fondo(args.ancho, args.alto))
+    print(f"Fondo escrito en {ruta_fondo(args.ancho, args.alto)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""
+Autojuego sin interfaz: enfrenta dos configuraciones de IA durante muchas
+partidas repartidas entre procesos y compara su fuerza.
+
+Cada par de partidas comienza con la misma apertura aleatoria y cambia los
+colores, ya que con la misma posición la búsqueda es determinista. Las
+condiciones de victoria son las de TableroAlice.verificar_victoria; además se
+declaran tablas por triple repetición, por falta de movimientos o al llegar
+al límite de jugadas. Cada partida se escribe como una línea JSON en cuanto
+termina (y, con --binario, también en el formato de partidas.py), y al final
+se muestra la diferencia de Elo estimada de A respecto a B.
+
+Uso:
+    python autojuego.py --partidas 200 --a profundidad=3 --b profundidad=2
+    python autojuego.py --a evaluador=completo --b evaluador=incremental --procesos 4
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from IA import IA
+from constantes import Color
+from partidas import EscritorPartidas
+from tablero import notacion, leer_notacion
+from tablero_bitboard import BACKENDS
+
+
+def leer_configuracion(texto):
+    """
+    Convierte "profundidad=3,tiempo_limite=0.5" en los argumentos de IA.
+    Los valores se interpretan como enteros o decimales cuando es posible.
+    """
+    configuracion = {}
+    if not texto:
+        return configuracion
+    for par in texto.split(','):
+        clave, valor = par.split('=', 1)
+        for tipo in (int, float):
+            try:
+                valor = tipo(valor)
+                break
+            except ValueError:
+                pass
+        configuracion[clave.strip()] = valor
+    return configuracion
+
+
+def generar_apertura(clase_tablero, jugadas, semilla):
+    """Devuelve una lista de movimientos aleatorios que no terminan la partida"""
+    generador = random.Random(semilla)
+    tablero = clase_tablero()
+    buscador = IA(Color.BLANCO, memoria_tt_mb=0)
+    apertura = []
+    for _ in range(jugadas):
+        candidatos = []
+        for movimiento in buscador.obtener_todos_movimientos(tablero, tablero.turno):
+            registro = tablero.realizar_movimiento(movimiento)
+            if registro:
+                if not tablero.verificar_victoria():
+                    candidatos.append(movimiento)
+                tablero.deshacer_movimiento(registro)
+        if not candidatos:
+            break
+        movimiento = generador.choice(candidatos)
+        tablero.realizar_movimiento(movimiento)
+        apertura.append(movimiento)
+    return apertura
+
+
+def jugar_partida(indice, configuracion_a, configuracion_b, a_blancas, apertura, max_jugadas, backend):
+    """
+    Juega una partida completa entre A y B.
+    :return: Un diccionario con los movimientos, el resultado y el tiempo de cada jugada.
+    """
+    tablero = BACKENDS[backend]()
+    for movimiento in apertura:
+        tablero.realizar_movimiento(movimiento)
+
+    color_a = Color.BLANCO if a_blancas else Color.NEGRO
+    color_b = Color.NEGRO if a_blancas else Color.BLANCO
+    jugadores = {color_a: IA(color_a, **configuracion_a), color_b: IA(color_b, **configuracion_b)}
+
+    movimientos = []
+    tiempos = []
+    repeticiones = {tablero.hash: 1}
+    ganador = None
+    motivo = None
+    try:
+        while len(movimientos) < max_jugadas:
+            ia = jugadores[tablero.turno]
+            inicio = time.perf_counter()
+            movimiento = ia.obtener_mejor_movimiento(tablero)
+            tiempos.append(round(time.perf_counter() - inicio, 4))
+            if movimiento is None:
+                motivo = "sin movimientos"
+                break
+            if not tablero.realizar_movimiento(movimiento):
+                ganador = Color.NEGRO if ia.color == Color.BLANCO else Color.BLANCO
+                motivo = "movimiento ilegal"
+                break
+            movimientos.append(notacion(movimiento))
+
+            victoria = tablero.verificar_victoria()
+            if victoria:
+                ganador, motivo = victoria
+                break
+            repeticiones[tablero.hash] = repeticiones.get(tablero.hash, 0) + 1
+            if repeticiones[tablero.hash] >= 3:
+                motivo = "repeticion"
+                break
+        else:
+            motivo = "limite de jugadas"
+    finally:
+        for ia in jugadores.values():
+            ia.cerrar()
+
+    if ganador is None:
+        resultado, puntos_a = "1/2-1/2", 0.5
+    else:
+        resultado = "1-0" if ganador == Color.BLANCO else "0-1"
+        puntos_a = 1.0 if ganador == color_a else 0.0
+    return {
+        'partida': indice,
+        'blancas': 'A' if a_blancas else 'B',
+        'apertura': [notacion(movimiento) for movimiento in apertura],
+        'movimientos': movimientos,
+        'tiempos': tiempos,
+        'resultado': resultado,
+        'motivo': motivo,
+        'puntos_a': puntos_a,
+    }
+
+
+def diferencia_elo(puntuacion):
+    """Diferencia de Elo correspondiente a una puntuación media entre 0 y 1"""
+    puntuacion = min(max(puntuacion, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / puntuacion - 1)
+
+
+def estimar_elo(puntos):
+    """
+    Estima la diferencia de Elo de A respecto a B a partir de los puntos de A
+    en cada partida.
+    :return: (diferencia, límite inferior, límite superior) con un intervalo del 95 %.
+    """
+    n = len(puntos)
+    media = sum(puntos) / n
+    varianza = sum((p - media) ** 2 for p in puntos) / n
+    error = 1.96 * math.sqrt(varianza / n)
+    return diferencia_elo(media), diferencia_elo(media - error), diferencia_elo(media + error)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Autojuego entre dos configuraciones de IA")
+    parser.add_argument('--a', default='', help="Argumentos de IA para A, p. ej. profundidad=3,evaluador=completo")
+    parser.add_argument('--b', default='', help="Argumentos de IA para B")
+    parser.add_argument('--partidas', type=int, default=100)
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos en paralelo (por defecto, uno por CPU)")
+    parser.add_argument('--apertura', type=int, default=4, help="Jugadas aleatorias al comienzo de cada par de partidas")
+    parser.add_argument('--max-jugadas', type=int, default=200)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida', default='autojuego.jsonl')
+    parser.add_argument('--binario', help="Archivo donde guardar además las partidas en formato binario (partidas.py)")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='listas')
+    args = parser.parse_args(argumentos)
+
+    configuracion_a = leer_configuracion(args.a)
+    configuracion_b = leer_configuracion(args.b)
+    # Sin límites, cada jugada se busca a profundidad fija
+    configuracion_a.setdefault('profundidad', 2)
+    configuracion_b.setdefault('profundidad', 2)
+
+    puntos = []
+    victorias = derrotas = tablas = 0
+    binario = EscritorPartidas(args.binario) if args.binario else None
+    with open(args.salida, 'w') as archivo, ProcessPoolExecutor(max_workers=args.procesos) as trabajadores:
+        futuros = []
+        for indice in range(args.partidas):
+            # Las dos partidas de cada par comparten apertura: se genera en la primera
+            if indice % 2 == 0:
+                apertura = generar_apertura(BACKENDS[args.backend], args.apertura,
+                                            args.semilla * 1000003 + indice // 2)
+            futuros.append(trabajadores.submit(jugar_partida, indice, configuracion_a, configuracion_b,
+                                               indice % 2 == 0, apertura, args.max_jugadas, args.backend))
+        for futuro in as_completed(futuros):
+            partida = futuro.result()
+            archivo.write(json.dumps(partida, ensure_ascii=False) + '\n')
+            archivo.flush()
+            if binario is not None:
+                blancas, negras = ('A', 'B') if partida['blancas'] == 'A' else ('B', 'A')
+                binario.escribir([leer_notacion(texto) for texto in partida['apertura'] + partida['movimientos']],
+                                 partida['resultado'], blancas, negras, apertura=len(partida['apertura']))
+            puntos.append(partida['puntos_a'])
+            if partida['puntos_a'] == 1:
+                victorias += 1
+            elif partida['puntos_a'] == 0:
+                derrotas += 1
+            else:
+                tablas += 1
+            color_a = 'blancas' if partida['blancas'] == 'A' else 'negras'
+            print(f"Partida {partida['partida']:4}: {partida['resultado']:7} ({partida['motivo']}), "
+                  f"A con {color_a}, "
+                  f"{len(partida['movimientos'])} jugadas   A +{victorias} ={tablas} -{derrotas}")
+    if binario is not None:
+        binario.cerrar()
+
+    if puntos:
+        elo, inferior, superior = estimar_elo(puntos)
+        print(f"A: {configuracion_a}")
+        print(f"B: {configuracion_b}")
+        print(f"Puntuación de A: {sum(puntos)}/{len(puntos)} ({sum(puntos) / len(puntos):.1%})")
+        print(f"Diferencia de Elo (A - B): {elo:+.0f} [{inferior:+.0f}, {superior:+.0f}] (95 %)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Banco de pruebas de la búsqueda: ejecuta IA.obtener_mejor_movimiento sobre un
+conjunto fijo de posiciones de medio juego y final a profundidad fija y
+registra el tiempo (el mejor de varias repeticiones), los nodos visitados,
+las podas y el movimiento elegido.
+
+Para que la comparación con la referencia no dependa de la carga de la
+máquina, cada búsqueda se mide también en unidades de una carga fija de
+Python (medir_unidad) cronometrada justo antes y justo después. La
+comparación que decide el código de salida usa la suma de esas unidades; los
+avisos por posición son orientativos.
+
+Uso:
+    python benchmark.py                          # escribe benchmark_resultados.json
+    python benchmark.py --guardar-base           # guarda los resultados como referencia
+    python benchmark.py --base benchmark_base.json --tolerancia 0.15
+
+benchmark_base.json guarda la referencia del repositorio; hay que regenerarla
+con --guardar-base en la máquina donde se vaya a comparar, ya que los tiempos
+dependen de ella.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+
+from IA import IA
+from tablero import notacion
+from tablero_bitboard import BACKENDS
+
+# Posiciones del banco: (nombre, FEN, profundidad)
+POSICIONES = [
+    ('apertura',
+     'r1bkqb1r/ppp2ppp/8/4p3/8/8/PP1P1PPP/RNBK1BNR 8/8/2n2n2/3p4/4P3/2P5/8/4Q3 w KQkq', 4),
+    ('medio juego',
+     'r3k2r/pp3ppp/2n5/8/3P4/5N2/PP3PPP/R3K2R 2b5/4q3/8/2p5/8/2B5/4Q3/8 b KQkq', 3),
+    ('medio juego cruzado',
+     'r2k3r/ppp2ppp/8/8/8/8/PPP2PPP/R2K3R 8/2n1q3/8/8/8/8/2N1Q3/8 w KQkq', 3),
+    ('damas en tableros distintos',
+     '3k4/pp3ppp/8/8/8/8/PP3PPP/3K4 8/4q3/8/8/8/8/4Q3/8 w -', 4),
+    ('final de torres',
+     '8/3k4/8/8/8/8/4P3/4K3 8/8/8/3r4/8/8/8/3R4 w -', 4),
+    ('final de peones',
+     '8/2pk4/8/8/8/8/3KP3/8 8/5p2/8/8/8/8/1P6/8 b -', 5),
+]
+# Búsquedas por posición
+REPETICIONES = 9
+
+
+def medir_unidad():
+    """Cronometra una carga fija de Python (diccionarios y enteros, como la búsqueda)"""
+    inicio = time.perf_counter()
+    cuentas = {}
+    for i in range(60000):
+        clave = i & 1023
+        cuentas[clave] = cuentas.get(clave, 0) + i * 3 % 7
+    return time.perf_counter() - inicio
+
+
+def medir(fen, profundidad, clase_tablero, evaluador, procesos=1, repeticiones=REPETICIONES):
+    """
+    Busca una posición y devuelve un diccionario con las métricas. La
+    búsqueda se repite con una IA nueva cada vez y se toma el menor tiempo,
+    que es el menos afectado por el resto de la máquina, y la mediana del
+    tiempo en unidades de medir_unidad, que es la más estable entre ejecuciones.
+    """
+    duracion = float('inf')
+    unidades = []
+    for _ in range(repeticiones):
+        tablero = clase_tablero.desde_fen(fen)
+        ia = IA(tablero.turno, profundidad, evaluador=evaluador, procesos=procesos)
+        unidad = medir_unidad()
+        inicio = time.perf_counter()
+        movimiento = ia.obtener_mejor_movimiento(tablero)
+        tiempo = time.perf_counter() - inicio
+        unidad = (unidad + medir_unidad()) / 2
+        duracion = min(duracion, tiempo)
+        unidades.append(tiempo / unidad)
+        ia.cerrar()
+    return {
+        'profundidad': profundidad,
+        'tiempo': round(duracion, 4),
+        'unidades': round(statistics.median(unidades), 3),
+        'nodos': ia.nodos,
+        'cortes': ia.cortes,
+        'tasa_cortes': round(ia.cortes / ia.nodos, 4) if ia.nodos else 0.0,
+        'nodos_por_segundo': round(ia.nodos / duracion) if duracion > 0 else 0,
+        'movimiento': notacion(movimiento) if movimiento else None,
+    }
+
+
+def comparar(resultados, base, tolerancia):
+    """
+    Compara los resultados con una referencia y devuelve la lista de avisos.
+    Se avisa de las posiciones más lentas que la tolerancia permite (en
+    unidades) y de los cambios de nodos o de movimiento elegido. Si la suma de
+    unidades de las posiciones comunes supera la tolerancia, el aviso empieza
+    por REGRESION.
+    """
+    avisos = []
+    total_actual = total_anterior = 0
+    for nombre, actual in resultados['posiciones'].items():
+        anterior = base['posiciones'].get(nombre)
+        if anterior is None:
+            continue
+        if 'unidades' in anterior:
+            total_actual += actual['unidades']
+            total_anterior += anterior['unidades']
+            if actual['unidades'] > anterior['unidades'] * (1 + tolerancia):
+                avisos.append(f"LENTO    {nombre}: {anterior['unidades']:.2f} -> {actual['unidades']:.2f} unidades")
+        if actual['nodos'] != anterior['nodos']:
+            avisos.append(f"NODOS    {nombre}: {anterior['nodos']} -> {actual['nodos']}")
+        if actual['movimiento'] != anterior['movimiento']:
+            avisos.append(f"JUGADA   {nombre}: {anterior['movimiento']} -> {actual['movimiento']}")
+    if total_actual > total_anterior * (1 + tolerancia):
+        avisos.append(f"REGRESION total: {total_anterior:.2f} -> {total_actual:.2f} unidades")
+    return avisos
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Banco de pruebas de la búsqueda de IA")
+    parser.add_argument('--salida', default='benchmark_resultados.json')
+    parser.add_argument('--base', default='benchmark_base.json', help="Resultados de referencia")
+    parser.add_argument('--guardar-base', action='store_true', help="Guardar los resultados como referencia")
+    parser.add_argument('--tolerancia', type=float, default=0.10,
+                        help="Aumento relativo de unidades permitido antes de avisar")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='listas')
+    parser.add_argument('--evaluador', choices=['incremental', 'completo'], default='incremental')
+    parser.add_argument('--procesos', type=int, default=1, help="Procesos para la búsqueda paralela (experimental)")
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES,
+                        help="Búsquedas por posición; se guardan el mejor tiempo y la mediana en unidades")
+    args = parser.parse_args(argumentos)
+
+    resultados = {
+        'backend': args.backend,
+        'evaluador': args.evaluador,
+        'procesos': args.procesos,
+        'repeticiones': args.repeticiones,
+        'python': platform.python_version(),
+        'posiciones': {},
+    }
+    for nombre, fen, profundidad in POSICIONES:
+        metricas = medir(fen, profundidad, BACKENDS[args.backend], args.evaluador, args.procesos,
+                         args.repeticiones)
+        resultados['posiciones'][nombre] = metricas
+        print(f"{nombre:28} prof {profundidad}  {metricas['tiempo']:8.3f} s  "
+              f"{metricas['nodos']:8} nodos  {metricas['tasa_cortes']:.1%} cortes  "
+              f"{metricas['nodos_por_segundo']:7} nodos/s  {metricas['movimiento']}")
+    resultados['tiempo_total'] = round(sum(m['tiempo'] for m in resultados['posiciones'].values()), 4)
+    resultados['unidades_totales'] = round(sum(m['unidades'] for m in resultados['posiciones'].values()), 3)
+    resultados['nodos_totales'] = sum(m['nodos'] for m in resultados['posiciones'].values())
+    print(f"Total: {resultados['tiempo_total']:.3f} s ({resultados['unidades_totales']:.2f} unidades), "
+          f"{resultados['nodos_totales']} nodos")
+
+    with open(args.salida, 'w') as archivo:
+        json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+
+    if args.guardar_base:
+        with open(args.base, 'w') as archivo:
+            json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+        print(f"Referencia guardada en {args.base}")
+        return 0
+
+    try:
+        with open(args.base) as archivo:
+            base = json.load(archivo)
+    except FileNotFoundError:
+        print(f"No hay referencia en {args.base}; usa --guardar-base para crearla")
+        return 0
+
+    avisos = comparar(resultados, base, args.tolerancia)
+    for aviso in avisos:
+        print(aviso)
+    if not avisos:
+        print("Sin regresiones respecto a la referencia")
+    return 1 if any(aviso.startswith('REGRESION') for aviso in avisos) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
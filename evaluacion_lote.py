@@ -0,0 +1,142 @@
+"""
+Evaluación por lotes con NumPy: puntúa N posiciones a la vez con los mismos
+términos que IA.evaluar_tablero (material, tablas de posición, peones
+doblados y aislados, y rey propio en jaque) y devuelve los mismos valores.
+
+Cada posición se representa como una matriz int8 de forma (2, 8, 8): un
+tablero por índice 0 y 1, con el valor de la pieza (Pieza.value) positivo
+para las blancas, negativo para las negras y 0 para las casillas vacías.
+
+Uso:
+    lote = a_lote([tablero1, tablero2, ...])
+    valores = evaluar_lote(lote, Color.NEGRO)
+"""
+import numpy as np
+
+from constantes import Pieza, Color, VALORES_PIEZAS, TABLAS_POSICION
+
+
+def _tabla_valores():
+    """
+    VALORES[codigo + 6, fila, columna]: material más posición de la pieza con
+    ese código en esa casilla, positivo para las blancas y negativo para las negras.
+    """
+    valores = np.zeros((13, 8, 8), dtype=np.int64)
+    for pieza in Pieza:
+        tabla = np.array(TABLAS_POSICION[pieza], dtype=np.int64)
+        valores[6 + pieza.value] = VALORES_PIEZAS[pieza] + tabla
+        # Las negras leen la tabla con la fila invertida
+        valores[6 - pieza.value] = -(VALORES_PIEZAS[pieza] + tabla[::-1])
+    return valores
+
+VALORES = _tabla_valores()
+
+SALTOS_CABALLO = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+PASOS_REY = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+DIRECCIONES_TORRE = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+DIRECCIONES_ALFIL = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+
+def a_matriz(tablero):
+    """Convierte un TableroAlice en una matriz int8 de forma (2, 8, 8)"""
+    matriz = np.zeros((2, 8, 8), dtype=np.int8)
+    for indice, filas in enumerate([tablero.tablero1, tablero.tablero2]):
+        for fila in range(8):
+            for columna in range(8):
+                pieza = filas[fila][columna]
+                if pieza:
+                    matriz[indice, fila, columna] = pieza[0].value if pieza[1] == Color.BLANCO else -pieza[0].value
+    return matriz
+
+
+def a_lote(tableros):
+    """Convierte una secuencia de TableroAlice en un lote int8 de forma (N, 2, 8, 8)"""
+    lote = np.zeros((len(tableros), 2, 8, 8), dtype=np.int8)
+    for i, tablero in enumerate(tableros):
+        lote[i] = a_matriz(tablero)
+    return lote
+
+
+def _desplazar(mascara, df, dc):
+    """Mueve cada casilla marcada (df, dc) posiciones; lo que sale del tablero se pierde"""
+    resultado = np.zeros_like(mascara)
+    filas_origen = slice(max(0, -df), 8 - max(0, df))
+    filas_destino = slice(max(0, df), 8 - max(0, -df))
+    columnas_origen = slice(max(0, -dc), 8 - max(0, dc))
+    columnas_destino = slice(max(0, dc), 8 - max(0, -dc))
+    resultado[..., filas_destino, columnas_destino] = mascara[..., filas_origen, columnas_origen]
+    return resultado
+
+
+def casillas_atacadas(lote, color):
+    """
+    Casillas atacadas por las piezas de un color, con las mismas reglas que
+    TableroAlice.esta_casilla_bajo_ataque: cada tablero por separado y las
+    piezas deslizantes detenidas por cualquier pieza.
+    :return: Una matriz booleana de forma (N, 2, 8, 8).
+    """
+    signo = 1 if color == Color.BLANCO else -1
+    ocupadas = lote != 0
+    atacadas = np.zeros(lote.shape, dtype=bool)
+
+    # Los peones blancos atacan hacia la fila 0 y los negros hacia la fila 7
+    peones = lote == signo * Pieza.PEON.value
+    avance = -1 if color == Color.BLANCO else 1
+    atacadas |= _desplazar(peones, avance, -1) | _desplazar(peones, avance, 1)
+
+    caballos = lote == signo * Pieza.CABALLO.value
+    for df, dc in SALTOS_CABALLO:
+        atacadas |= _desplazar(caballos, df, dc)
+
+    reyes = lote == signo * Pieza.REY.value
+    for df, dc in PASOS_REY:
+        atacadas |= _desplazar(reyes, df, dc)
+
+    damas = lote == signo * Pieza.DAMA.value
+    for direcciones, tipo in [(DIRECCIONES_TORRE, Pieza.TORRE), (DIRECCIONES_ALFIL, Pieza.ALFIL)]:
+        deslizantes = (lote == signo * tipo.value) | damas
+        for df, dc in direcciones:
+            rayo = _desplazar(deslizantes, df, dc)
+            while rayo.any():
+                atacadas |= rayo
+                rayo = _desplazar(rayo & ~ocupadas, df, dc)
+    return atacadas
+
+
+def _penalizacion_peones(lote, color):
+    """Penalizaciones por peones doblados y aislados, como IA.evaluar_peones, por posición"""
+    signo = 1 if color == Color.BLANCO else -1
+    # Peones por (posición, tablero, columna)
+    columnas = (lote == signo * Pieza.PEON.value).sum(axis=2, dtype=np.int64)
+    doblados = np.where(columnas > 1, columnas, 0) * 20
+    vecinas = np.zeros_like(columnas)
+    vecinas[..., 1:] += columnas[..., :-1]
+    vecinas[..., :-1] += columnas[..., 1:]
+    aislados = np.where(vecinas == 0, columnas, 0) * 30
+    return (doblados + aislados).sum(axis=(1, 2))
+
+
+def evaluar_lote(lote, color):
+    """
+    Evalúa un lote de posiciones desde la perspectiva de color.
+    :param lote: Matriz int8 de forma (N, 2, 8, 8) (ver a_lote).
+    :param color: El color para el que se evalúa, como IA.color.
+    :return: Un vector de N enteros igual a IA.evaluar_tablero en cada posición.
+    """
+    lote = np.asarray(lote, dtype=np.int8)
+    signo = 1 if color == Color.BLANCO else -1
+    rival = Color.NEGRO if color == Color.BLANCO else Color.BLANCO
+
+    # Material y posición, desde el punto de vista de las blancas
+    filas = np.arange(8).reshape(1, 1, 8, 1)
+    columnas = np.arange(8).reshape(1, 1, 1, 8)
+    valor = VALORES[lote.astype(np.int64) + 6, filas, columnas].sum(axis=(1, 2, 3)) * signo
+
+    valor -= _penalizacion_peones(lote, color)
+    valor += _penalizacion_peones(lote, rival)
+
+    # Seguridad del rey: -100 por cada tablero en el que el rey propio está en jaque
+    rey_propio = lote == signo * Pieza.REY.value
+    en_jaque = (rey_propio & casillas_atacadas(lote, rival)).any(axis=(2, 3))
+    valor -= 100 * en_jaque.sum(axis=1)
+    return valor
@@ -0,0 +1,121 @@
+"""
+Consulta de las tablas de finales generadas por retrogrado.py: rey contra
+rey, rey y torre contra rey, y rey y dama contra rey, en cualquiera de los
+dos tableros. Cada posición ocupa un byte y los archivos se abren con mmap.
+
+Valor de cada byte, desde el punto de vista del bando que mueve:
+    0           tablas
+    1 .. 127    gana en ese número de jugadas (medias jugadas)
+    128         posición imposible (algún rey en jaque o casillas repetidas)
+    129 .. 255  pierde en (valor - 128) jugadas
+
+Índices: cada pieza se codifica como (tablero - 1) * 64 + fila * 8 + columna.
+    KvK:   rey que mueve * 128 + rey rival
+    KXvK:  (0 si mueve el bando fuerte, 128 ** 3 si no) + rey fuerte * 128 ** 2
+           + pieza * 128 + rey débil
+"""
+import mmap
+import os
+
+from constantes import Pieza, Color
+
+
+TABLAS = 0
+INVALIDA = 128
+ARCHIVOS = {None: 'KvK.bin', Pieza.TORRE: 'KRvK.bin', Pieza.DAMA: 'KQvK.bin'}
+POSICIONES_PIEZA = 128
+
+
+def codigo_pieza(tablero_num, fila, columna):
+    return (tablero_num - 1) * 64 + fila * 8 + columna
+
+
+def indice_kvk(rey_mueve, rey_rival):
+    return rey_mueve * POSICIONES_PIEZA + rey_rival
+
+
+def indice_kxvk(mueve_fuerte, rey_fuerte, pieza, rey_debil):
+    desplazamiento = 0 if mueve_fuerte else POSICIONES_PIEZA ** 3
+    return desplazamiento + (rey_fuerte * POSICIONES_PIEZA + pieza) * POSICIONES_PIEZA + rey_debil
+
+
+def decodificar_valor(byte):
+    """
+    Convierte un byte de la tabla en jugadas hasta el final desde el punto de
+    vista del bando que mueve: positivo si gana, negativo si pierde, 0 en
+    tablas y None si la posición es imposible.
+    """
+    if byte == INVALIDA:
+        return None
+    if byte > INVALIDA:
+        return -(byte - INVALIDA)
+    return byte
+
+
+class TablasFinales:
+    """Acceso por mmap a las tablas de finales de un directorio"""
+    def __init__(self, directorio='finales'):
+        """
+        :param directorio: Directorio con los archivos de retrogrado.py. Los
+                           materiales cuyo archivo no existe no se consultan.
+        """
+        self.directorio = directorio
+        self._archivos = {}
+        self._datos = {}
+        for pieza, nombre in ARCHIVOS.items():
+            ruta = os.path.join(directorio, nombre)
+            if os.path.exists(ruta) and os.path.getsize(ruta) > 0:
+                archivo = open(ruta, 'rb')
+                self._archivos[pieza] = archivo
+                self._datos[pieza] = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def cerrar(self):
+        for datos in self._datos.values():
+            datos.close()
+        for archivo in self._archivos.values():
+            archivo.close()
+        self._datos = {}
+        self._archivos = {}
+
+    def consultar(self, tablero):
+        """
+        Busca la posición en las tablas.
+        :return: Jugadas hasta el final para el bando que mueve (ver
+                 decodificar_valor), o None si el material no está cubierto.
+        """
+        if not self._datos:
+            return None
+        casillas = tablero.casillas_color
+        piezas = [len(casillas[1][0]) + len(casillas[2][0]), len(casillas[1][1]) + len(casillas[2][1])]
+        if piezas[0] + piezas[1] > 3 or min(piezas) != 1:
+            return None
+        reyes = tablero.reyes
+        if reyes[0] is None or reyes[1] is None:
+            return None
+
+        if piezas[0] + piezas[1] == 2:
+            datos = self._datos.get(None)
+            if datos is None:
+                return None
+            mueve = tablero.turno.value
+            return decodificar_valor(datos[indice_kvk(codigo_pieza(*reyes[mueve]),
+                                                      codigo_pieza(*reyes[1 - mueve]))])
+
+        fuerte = Color.BLANCO if piezas[0] == 2 else Color.NEGRO
+        for tablero_num in [1, 2]:
+            for casilla in casillas[tablero_num][fuerte.value]:
+                fila, columna = divmod(casilla, 8)
+                pieza = tablero.obtener_pieza(tablero_num, fila, columna)
+                if pieza[0] != Pieza.REY:
+                    posicion_pieza = (tablero_num, fila, columna)
+                    tipo = pieza[0]
+        datos = self._datos.get(tipo)
+        if datos is None:
+            return None
+        # Las tablas no contemplan el enroque
+        if (tipo == Pieza.TORRE and not tablero.reyes_movidos[fuerte] and
+                not all(tablero.torres_movidas[fuerte].values())):
+            return None
+        indice = indice_kxvk(tablero.turno == fuerte, codigo_pieza(*reyes[fuerte.value]),
+                             codigo_pieza(*posicion_pieza), codigo_pieza(*reyes[1 - fuerte.value]))
+        return decodificar_valor(datos[indice])
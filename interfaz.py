@@ -1,12 +1,22 @@
 import pygame
+import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 import copy
 from IA import IA
 from tablero import TableroAlice, Color, Pieza
+import atlas
 
 
 class JuegoAlice:
+    # Milisegundos que el bucle principal duerme esperando eventos
+    ESPERA_INACTIVA_MS = 1000
+    ESPERA_PENSANDO_MS = 100
+    # Milisegundos entre fotogramas de la animación de "Pensando..."
+    PASO_PENSANDO_MS = 500
+
     def __init__(self):
         pygame.init()
         self.ANCHO_VENTANA = 1450
@@ -14,6 +24,7 @@ class JuegoAlice:
         self.TAMANO_CASILLA = 60
         self.ESPACIO_ENTRE_TABLEROS = 100
         self.OFFSET_X = 50
+        self.TAMANO_MINIATURA = 30
         
         self.pantalla = pygame.display.set_mode((self.ANCHO_VENTANA, self.ALTO_VENTANA))
         pygame.display.set_caption('Proyecto II IA - Ajedrez Alice')
@@ -27,7 +38,11 @@ class JuegoAlice:
         self.tablero_seleccionado = None
         self.movimientos_validos = []
         self.turno_actual = Color.BLANCO
-        self.ia = IA(Color.NEGRO)
+        self.ia = IA(Color.NEGRO, tiempo_limite=5.0, libro='libro.bin', finales='finales')
+        # La búsqueda de la IA se ejecuta en un hilo aparte para no bloquear la ventana
+        self.hilo_ia = ThreadPoolExecutor(max_workers=1)
+        self.busqueda_ia = None
+        self.cancelacion_ia = None
         
         # Lista para almacenar piezas capturadas
         self.piezas_capturadas_blancas = []
@@ -41,201 +56,293 @@ class JuegoAlice:
         self.font_pequeño = pygame.font.Font(None, 24)  # Para las coordenadas
         
         # Cargar imagen de fondo
-        try:
-            self.imagen_fondo = pygame.image.load('imagenes/alice.jpg')
-            self.imagen_fondo = pygame.transform.scale(self.imagen_fondo, (self.ANCHO_VENTANA, self.ALTO_VENTANA))
-        except:
-            print("Error al cargar la imagen de fondo")
-            self.imagen_fondo = None
+        self.imagen_fondo = self.cargar_fondo()
         
         self.ganador = None  # Nuevo atributo para almacenar el ganador
+        
+        # Capas que no cambian y estado de lo ya dibujado en la ventana
+        self.crear_capas_estaticas()
 
     def cargar_imagenes(self):
+        """
+        Carga las piezas escaladas al tamaño de casilla. Si existe el atlas
+        generado por atlas.py para ese tamaño se lee de una vez; si no, se
+        escalan las imágenes originales una a una. Las superficies se
+        convierten al formato de la ventana para que dibujarlas sea rápido.
+        """
         self.imagenes = {}
-        mapeo_nombre = {
-            Pieza.PEON: 'peon',
-            Pieza.TORRE: 'torre',
-            Pieza.ALFIL: 'alfil',
-            Pieza.CABALLO: 'caballo',
-            Pieza.DAMA: 'dama',
-            Pieza.REY: 'rey'
-        }
-        mapeo_color = {
-            Color.BLANCO: 'blanco',
-            Color.NEGRO: 'negro'
-        }
+        # Miniaturas para el panel de capturas
+        self.miniaturas = {}
+        
+        ruta = atlas.ruta_atlas(self.TAMANO_CASILLA)
+        hoja = None
+        if os.path.exists(ruta):
+            try:
+                hoja = pygame.image.load(ruta).convert_alpha()
+            except Exception as e:
+                print(f"Error cargando {ruta}: {e}")
+        rectangulos = atlas.rectangulos_atlas(self.TAMANO_CASILLA)
         
         for pieza in [Pieza.PEON, Pieza.TORRE, Pieza.ALFIL, Pieza.CABALLO, Pieza.DAMA, Pieza.REY]:
             for color in [Color.BLANCO, Color.NEGRO]:
-                nombre_archivo = f'imagenes/{mapeo_nombre[pieza]}_{mapeo_color[color]}.png'
-                try:
-                    imagen = pygame.image.load(nombre_archivo)
-                    imagen = pygame.transform.scale(imagen, (self.TAMANO_CASILLA, self.TAMANO_CASILLA))
-                    self.imagenes[(pieza, color)] = imagen
-                except Exception as e:
-                    print(f"Error cargando {nombre_archivo}: {e}")
+                if hoja is not None:
+                    imagen = hoja.subsurface(rectangulos[(pieza, color)])
+                else:
+                    nombre_archivo = atlas.ruta_pieza(pieza, color)
+                    try:
+                        imagen = pygame.image.load(nombre_archivo).convert_alpha()
+                        imagen = pygame.transform.scale(imagen, (self.TAMANO_CASILLA, self.TAMANO_CASILLA))
+                    except Exception as e:
+                        print(f"Error cargando {nombre_archivo}: {e}")
+                        continue
+                self.imagenes[(pieza, color)] = imagen
+                self.miniaturas[(pieza, color)] = pygame.transform.scale(imagen, (self.TAMANO_MINIATURA,) * 2)
+
+    def cargar_fondo(self):
+        """
+        Devuelve la imagen de fondo al tamaño de la ventana: la ya escalada por
+        atlas.py si existe y, si no, la original escalada aquí.
+        """
+        ruta = atlas.ruta_fondo(self.ANCHO_VENTANA, self.ALTO_VENTANA)
+        try:
+            if os.path.exists(ruta):
+                return pygame.image.load(ruta).convert()
+            imagen = pygame.image.load(atlas.FONDO)
+            return pygame.transform.scale(imagen, (self.ANCHO_VENTANA, self.ALTO_VENTANA)).convert()
+        except:
+            print("Error al cargar la imagen de fondo")
+            return None
 
     def ejecutar(self):
+        """
+        Bucle principal. Solo se dibuja cuando algo ha marcado la escena como
+        sucia (clics, teclas, movimientos, la victoria o la IA pensando); el
+        resto del tiempo el bucle duerme en pygame.event.wait.
+        """
         reloj = pygame.time.Clock()
         while True:
-            for evento in pygame.event.get():
+            if self.escena_sucia:
+                eventos = pygame.event.get()
+            else:
+                # Mientras la IA piensa se despierta a menudo para recoger su resultado
+                espera = self.ESPERA_PENSANDO_MS if self.busqueda_ia else self.ESPERA_INACTIVA_MS
+                eventos = [pygame.event.wait(espera)] + pygame.event.get()
+
+            for evento in eventos:
                 if evento.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                elif evento.type == pygame.MOUSEBUTTONDOWN and not self.ganador:
+                    self.salir()
+                elif evento.type == pygame.VIDEOEXPOSE:
+                    self.redibujar_todo = True
+                    self.escena_sucia = True
+                elif evento.type == pygame.MOUSEBUTTONDOWN and not self.ganador and not self.busqueda_ia:
                     if evento.button == 1:  # Click izquierdo
                         self.manejar_click()
+                        self.escena_sucia = True
+                elif evento.type == pygame.KEYDOWN and self.busqueda_ia:
+                    if evento.key == pygame.K_ESCAPE:  # Escape: la IA juega lo mejor encontrado
+                        self.cancelacion_ia.set()
                 elif evento.type == pygame.KEYDOWN and self.ganador:
                     if evento.key == pygame.K_SPACE:  # Tecla espacio
                         self.reiniciar_juego()
+                        self.escena_sucia = True
 
-            self.dibujar_tablero()
-            if self.ganador:
-                self.mostrar_mensaje_victoria()
-            pygame.display.flip()
-            reloj.tick(60)
+            # Comprobar si la IA ha terminado de pensar
+            if self.busqueda_ia:
+                if self.busqueda_ia.done():
+                    mejor_movimiento = self.busqueda_ia.result()
+                    self.busqueda_ia = None
+                    self.cancelacion_ia = None
+                    self.manejar_turno_ia(mejor_movimiento)
+                    self.comprobar_fin_partida()
+                    self.escena_sucia = True
+                elif not self.indicador_dibujado or self.indicador_dibujado[0] != self.texto_indicador_turno():
+                    # El indicador de turno se anima mientras piensa: solo se
+                    # redibuja cuando cambian los puntos
+                    self.escena_sucia = True
 
-    def dibujar_tablero(self):
-        # Dibujar fondo primero
+            if self.escena_sucia:
+                rectangulos = self.dibujar_tablero()
+                # El mensaje es semitransparente: se dibuja una sola vez sobre la escena
+                if self.ganador and not self.victoria_dibujada:
+                    rectangulos.append(self.mostrar_mensaje_victoria())
+                    self.victoria_dibujada = True
+                if rectangulos:
+                    pygame.display.update(rectangulos)
+                self.escena_sucia = False
+                reloj.tick(60)
+
+    def offset_tablero(self, tablero_num):
+        """Coordenada x del borde izquierdo de un tablero"""
+        if tablero_num == 1:
+            return self.OFFSET_X
+        return self.OFFSET_X + self.TAMANO_CASILLA * 8 + self.ESPACIO_ENTRE_TABLEROS
+
+    def crear_capas_estaticas(self):
+        """
+        Dibuja una sola vez lo que no cambia durante la partida: el fondo, las
+        coordenadas, las casillas vacías y el fondo del panel de capturas.
+        dibujar_tablero restaura desde esta capa las zonas que redibuja.
+        """
+        self.capa_estatica = pygame.Surface((self.ANCHO_VENTANA, self.ALTO_VENTANA))
         if self.imagen_fondo:
-            self.pantalla.blit(self.imagen_fondo, (0, 0))
+            self.capa_estatica.blit(self.imagen_fondo, (0, 0))
         else:
-            self.pantalla.fill((50, 50, 50))
-        
-        # Dibujar tableros
+            self.capa_estatica.fill((50, 50, 50))
+
         for tablero_num in [1, 2]:
-            # Calcular offset para cada tablero
-            offset_x = self.OFFSET_X if tablero_num == 1 else self.OFFSET_X + self.TAMANO_CASILLA * 8 + self.ESPACIO_ENTRE_TABLEROS
-            
-            # Dibujar coordenadas de letras (a-h)
-            letras = 'abcdefgh'
-            for i, letra in enumerate(letras):
-                # Texto de la letra con borde negro
-                # Primero dibujamos el texto en negro en las 8 direcciones
-                texto = self.font_pequeño.render(letra, True, (0, 0, 0))
-                for dx, dy in [(-1,-1), (-1,0), (-1,1), (0,-1), (0,1), (1,-1), (1,0), (1,1)]:
-                    # Posición abajo
-                    x = offset_x + i * self.TAMANO_CASILLA + (self.TAMANO_CASILLA - texto.get_width()) // 2
-                    y = 8 * self.TAMANO_CASILLA + 5
-                    self.pantalla.blit(texto, (x + dx, y + dy))
-                    # Posición arriba
-                    y = -20
-                    self.pantalla.blit(texto, (x + dx, y + dy))
-                
-                # Luego dibujamos el texto blanco en el centro
-                texto = self.font_pequeño.render(letra, True, (255, 255, 255))
-                # Posición abajo
-                x = offset_x + i * self.TAMANO_CASILLA + (self.TAMANO_CASILLA - texto.get_width()) // 2
-                y = 8 * self.TAMANO_CASILLA + 5
-                self.pantalla.blit(texto, (x, y))
-                # Posición arriba
-                y = -20
-                self.pantalla.blit(texto, (x, y))
-
-            # Dibujar coordenadas de números (1-8)
-            numeros = '87654321'
-            for i, numero in enumerate(numeros):
-                # Texto del número con borde negro
-                # Primero dibujamos el texto en negro en las 8 direcciones
-                texto = self.font_pequeño.render(numero, True, (0, 0, 0))
-                for dx, dy in [(-1,-1), (-1,0), (-1,1), (0,-1), (0,1), (1,-1), (1,0), (1,1)]:
-                    # Posición izquierda
-                    x = offset_x - 20
-                    y = i * self.TAMANO_CASILLA + (self.TAMANO_CASILLA - texto.get_height()) // 2
-                    self.pantalla.blit(texto, (x + dx, y + dy))
-                    # Posición derecha
-                    x = offset_x + 8 * self.TAMANO_CASILLA + 10
-                    self.pantalla.blit(texto, (x + dx, y + dy))
-                
-                # Luego dibujamos el texto blanco en el centro
-                texto = self.font_pequeño.render(numero, True, (255, 255, 255))
-                # Posición izquierda
-                x = offset_x - 20
-                y = i * self.TAMANO_CASILLA + (self.TAMANO_CASILLA - texto.get_height()) // 2
-                self.pantalla.blit(texto, (x, y))
-                # Posición derecha
-                x = offset_x + 8 * self.TAMANO_CASILLA + 10
-                self.pantalla.blit(texto, (x, y))
-            
-            # Dibujar el tablero
+            offset_x = self.offset_tablero(tablero_num)
+
+            # Coordenadas de letras (a-h), abajo y arriba
+            for i, letra in enumerate('abcdefgh'):
+                texto = self.renderizar_coordenada(letra)
+                x = offset_x + i * self.TAMANO_CASILLA + (self.TAMANO_CASILLA - texto.get_width() + 2) // 2
+                for y in [8 * self.TAMANO_CASILLA + 5, -20]:
+                    self.capa_estatica.blit(texto, (x - 1, y - 1))
+
+            # Coordenadas de números (1-8), a la izquierda y a la derecha
+            for i, numero in enumerate('87654321'):
+                texto = self.renderizar_coordenada(numero)
+                y = i * self.TAMANO_CASILLA + (self.TAMANO_CASILLA - texto.get_height() + 2) // 2
+                for x in [offset_x - 20, offset_x + 8 * self.TAMANO_CASILLA + 10]:
+                    self.capa_estatica.blit(texto, (x - 1, y - 1))
+
+            # Casillas vacías
             for fila in range(8):
                 for columna in range(8):
                     x = offset_x + columna * self.TAMANO_CASILLA
                     y = fila * self.TAMANO_CASILLA
                     color = (238, 238, 210) if (fila + columna) % 2 == 0 else (118, 150, 86)
-                    pygame.draw.rect(self.pantalla, color, (x, y, self.TAMANO_CASILLA, self.TAMANO_CASILLA))
-                    
-                    # Resaltar casilla seleccionada
-                    if self.pieza_seleccionada and self.tablero_seleccionado == tablero_num:
-                        fila_sel, col_sel = self.pieza_seleccionada
-                        if fila == fila_sel and columna == col_sel:
-                            s = pygame.Surface((self.TAMANO_CASILLA, self.TAMANO_CASILLA))
-                            s.set_alpha(128)
-                            s.fill((186, 202, 43))
-                            self.pantalla.blit(s, (x, y))
-                    
-                    # Resaltar movimientos válidos
-                    if (fila, columna) in self.movimientos_validos and tablero_num == self.tablero_seleccionado:
-                        s = pygame.Surface((self.TAMANO_CASILLA, self.TAMANO_CASILLA))
-                        s.set_alpha(128)
-                        pieza_destino = self.tablero.obtener_pieza(tablero_num, fila, columna)
-                        if pieza_destino:
-                            s.fill((255, 0, 0))
-                        else:
-                            s.fill((246, 246, 105))
-                        self.pantalla.blit(s, (x, y))
-                    
-                    # Dibujar pieza
+                    pygame.draw.rect(self.capa_estatica, color, (x, y, self.TAMANO_CASILLA, self.TAMANO_CASILLA))
+
+        # Panel de capturas: posición y títulos; el contenido lo construye construir_panel_capturas
+        self.rect_panel = pygame.Rect(2 * self.OFFSET_X + 2 * self.TAMANO_CASILLA * 8 + self.ESPACIO_ENTRE_TABLEROS, 0,
+                                      300, self.ALTO_VENTANA)
+        self.titulos_panel = [
+            (self.font.render("Capturadas Blancas:", True, self.COLOR_TEXTO), (20, 20)),
+            (self.font.render("Capturadas Negras:", True, self.COLOR_TEXTO), (20, 300)),
+        ]
+        self.capturas_panel = None
+        self.superficie_panel = None
+
+        # Resaltados semitransparentes: casilla seleccionada, movimiento y captura
+        self.capas_resaltado = {}
+        for tipo, color in [('seleccion', (186, 202, 43)), ('movimiento', (246, 246, 105)), ('captura', (255, 0, 0))]:
+            capa = pygame.Surface((self.TAMANO_CASILLA, self.TAMANO_CASILLA))
+            capa.set_alpha(128)
+            capa.fill(color)
+            self.capas_resaltado[tipo] = capa
+
+        self.casillas_dibujadas = {}
+        self.indicador_dibujado = None
+        self.victoria_dibujada = False
+        self.redibujar_todo = True
+        self.escena_sucia = True
+
+    def renderizar_coordenada(self, texto):
+        """
+        Texto blanco de una coordenada con borde negro de 1 píxel; la superficie
+        es 2 píxeles más ancha y más alta que el texto
+        """
+        negro = self.font_pequeño.render(texto, True, (0, 0, 0))
+        blanco = self.font_pequeño.render(texto, True, (255, 255, 255))
+        superficie = pygame.Surface((negro.get_width() + 2, negro.get_height() + 2), pygame.SRCALPHA)
+        for dx, dy in [(-1,-1), (-1,0), (-1,1), (0,-1), (0,1), (1,-1), (1,0), (1,1)]:
+            superficie.blit(negro, (1 + dx, 1 + dy))
+        superficie.blit(blanco, (1, 1))
+        return superficie
+
+    def invalidar_casillas(self, rect):
+        """Obliga a redibujar en el siguiente fotograma las casillas que toca el rectángulo"""
+        for tablero_num, fila, columna in list(self.casillas_dibujadas):
+            x = self.offset_tablero(tablero_num) + columna * self.TAMANO_CASILLA
+            y = fila * self.TAMANO_CASILLA
+            if rect.colliderect((x, y, self.TAMANO_CASILLA, self.TAMANO_CASILLA)):
+                del self.casillas_dibujadas[(tablero_num, fila, columna)]
+
+    def dibujar_tablero(self):
+        """
+        Dibuja lo que ha cambiado desde la llamada anterior: las casillas cuya
+        pieza o resaltado es distinto, el panel de capturas y el indicador de
+        turno. Con self.redibujar_todo se repinta la ventana entera.
+        :return: Los rectángulos modificados, para pygame.display.update.
+        """
+        rectangulos = []
+        redibujar_todo = self.redibujar_todo
+        if redibujar_todo:
+            self.pantalla.blit(self.capa_estatica, (0, 0))
+            self.casillas_dibujadas = {}
+            self.indicador_dibujado = None
+            self.victoria_dibujada = False
+            self.redibujar_todo = False
+            rectangulos.append(self.pantalla.get_rect())
+
+        for tablero_num in [1, 2]:
+            offset_x = self.offset_tablero(tablero_num)
+            seleccionado = tablero_num == self.tablero_seleccionado
+            for fila in range(8):
+                for columna in range(8):
                     pieza = self.tablero.obtener_pieza(tablero_num, fila, columna)
+                    resaltado = None
+                    if seleccionado:
+                        if self.pieza_seleccionada == (fila, columna):
+                            resaltado = 'seleccion'
+                        elif (fila, columna) in self.movimientos_validos:
+                            resaltado = 'captura' if pieza else 'movimiento'
+
+                    clave = (tablero_num, fila, columna)
+                    if self.casillas_dibujadas.get(clave) == (pieza, resaltado):
+                        continue
+                    self.casillas_dibujadas[clave] = (pieza, resaltado)
+
+                    rect = pygame.Rect(offset_x + columna * self.TAMANO_CASILLA, fila * self.TAMANO_CASILLA,
+                                       self.TAMANO_CASILLA, self.TAMANO_CASILLA)
+                    self.pantalla.blit(self.capa_estatica, rect, rect)
+                    if resaltado:
+                        self.pantalla.blit(self.capas_resaltado[resaltado], rect)
                     if pieza:
                         imagen = self.imagenes.get(pieza)
                         if imagen:
-                            self.pantalla.blit(imagen, (x, y))
+                            self.pantalla.blit(imagen, rect)
+                    rectangulos.append(rect)
 
-        # Dibujar panel de capturas (ajustado a la nueva posición)
-        panel_rect = pygame.Rect(2 * self.OFFSET_X + 2 * self.TAMANO_CASILLA * 8 + self.ESPACIO_ENTRE_TABLEROS, 0, 
-                               300, self.ALTO_VENTANA)
-        pygame.draw.rect(self.pantalla, self.COLOR_PANEL, panel_rect)
-        
-        # Dibujar piezas capturadas y texto
-        self.dibujar_panel_capturas()
-        
-        # Dibujar indicador de turno
-        self.dibujar_indicador_turno()
-        
-        pygame.display.flip()
-
-    def dibujar_panel_capturas(self):
-        # Títulos
-        texto_blancas = self.font.render("Capturadas Blancas:", True, self.COLOR_TEXTO)
-        texto_negras = self.font.render("Capturadas Negras:", True, self.COLOR_TEXTO)
-        self.pantalla.blit(texto_blancas, (2 * self.OFFSET_X + 2 * self.TAMANO_CASILLA * 8 + self.ESPACIO_ENTRE_TABLEROS + 20, 20))
-        self.pantalla.blit(texto_negras, (2 * self.OFFSET_X + 2 * self.TAMANO_CASILLA * 8 + self.ESPACIO_ENTRE_TABLEROS + 20, 300))
-
-        # Dibujar piezas capturadas
-        y_blancas = 60
-        x_blancas = 2 * self.OFFSET_X + 2 * self.TAMANO_CASILLA * 8 + self.ESPACIO_ENTRE_TABLEROS + 40
-        for pieza in self.piezas_capturadas_blancas:
-            imagen = self.imagenes.get(pieza)
-            if imagen:
-                imagen_mini = pygame.transform.scale(imagen, (30, 30))
-                self.pantalla.blit(imagen_mini, (x_blancas, y_blancas))
-                x_blancas += 35
-                if x_blancas > 2 * self.OFFSET_X + 2 * self.TAMANO_CASILLA * 8 + self.ESPACIO_ENTRE_TABLEROS + 240:  # Nueva fila
-                    x_blancas = 2 * self.OFFSET_X + 2 * self.TAMANO_CASILLA * 8 + self.ESPACIO_ENTRE_TABLEROS + 40
-                    y_blancas += 35
-
-        y_negras = 340
-        x_negras = 2 * self.OFFSET_X + 2 * self.TAMANO_CASILLA * 8 + self.ESPACIO_ENTRE_TABLEROS + 40
-        for pieza in self.piezas_capturadas_negras:
-            imagen = self.imagenes.get(pieza)
-            if imagen:
-                imagen_mini = pygame.transform.scale(imagen, (30, 30))
-                self.pantalla.blit(imagen_mini, (x_negras, y_negras))
-                x_negras += 35
-                if x_negras > 2 * self.OFFSET_X + 2 * self.TAMANO_CASILLA * 8 + self.ESPACIO_ENTRE_TABLEROS + 240:  # Nueva fila
-                    x_negras = 2 * self.OFFSET_X + 2 * self.TAMANO_CASILLA * 8 + self.ESPACIO_ENTRE_TABLEROS + 40
-                    y_negras += 35
+        rectangulos.extend(self.dibujar_panel_capturas(forzar=redibujar_todo))
+        rectangulos.extend(self.dibujar_indicador_turno())
+        return rectangulos
+
+    def dibujar_panel_capturas(self, forzar=False):
+        """
+        Copia el panel de capturas en la ventana solo si han cambiado las
+        piezas capturadas, reconstruyéndolo antes, o si se pide forzar.
+        :return: Los rectángulos modificados.
+        """
+        capturas = (tuple(self.piezas_capturadas_blancas), tuple(self.piezas_capturadas_negras))
+        if capturas != self.capturas_panel:
+            self.capturas_panel = capturas
+            self.superficie_panel = self.construir_panel_capturas()
+        elif not forzar:
+            return []
+        self.pantalla.blit(self.superficie_panel, self.rect_panel)
+        return [self.rect_panel]
+
+    def construir_panel_capturas(self):
+        """Dibuja el fondo, los títulos y las miniaturas de las piezas capturadas en una superficie"""
+        superficie = pygame.Surface(self.rect_panel.size)
+        superficie.fill(self.COLOR_PANEL)
+        for texto, posicion in self.titulos_panel:
+            superficie.blit(texto, posicion)
+
+        # Miniaturas en filas de hasta 6, con las coordenadas relativas al panel
+        for piezas, y in [(self.piezas_capturadas_blancas, 60), (self.piezas_capturadas_negras, 340)]:
+            x = 40
+            for pieza in piezas:
+                miniatura = self.miniaturas.get(pieza)
+                if miniatura:
+                    superficie.blit(miniatura, (x, y))
+                    x += 35
+                    if x > 240:  # Nueva fila
+                        x = 40
+                        y += 35
+        return superficie
 
     def obtener_casilla_desde_mouse(self, pos_mouse):
         """Convierte la posición del mouse en coordenadas del tablero"""
@@ -281,7 +388,7 @@ class JuegoAlice:
                 print(f"Pieza seleccionada en: Tablero {tablero}, {notacion}")
                 self.pieza_seleccionada = (fila, columna)
                 self.tablero_seleccionado = tablero
-                self.movimientos_validos = self.tablero.movimientos_pieza(pieza[0], (fila, columna), tablero)
+                self.movimientos_validos = self.tablero.movimientos_legales_pieza(pieza[0], (fila, columna), tablero)
         else:
             # Mover pieza y mostrar información del movimiento
             desde_fila, desde_col = self.pieza_seleccionada
@@ -314,15 +421,20 @@ class JuegoAlice:
                 self.turno_actual = Color.NEGRO if self.turno_actual == Color.BLANCO else Color.BLANCO
                 
                 # Turno de la IA
-                if self.turno_actual == Color.NEGRO:
+                if self.turno_actual == Color.NEGRO and not self.comprobar_fin_partida():
                     print("\nTurno de la IA...")
-                    self.manejar_turno_ia()
+                    self.iniciar_turno_ia()
             
             # Limpiar selección
             self.pieza_seleccionada = None
             self.tablero_seleccionado = None
             self.movimientos_validos = []
-        
+
+    def comprobar_fin_partida(self):
+        """
+        Comprueba si la partida ha terminado y anuncia al ganador. Si el bando
+        al que le toca no tiene movimientos legales, la partida es tablas.
+        """
         if self.verificar_victoria():
             color, motivo = self.ganador
             if color == "Negras":
@@ -330,12 +442,32 @@ class JuegoAlice:
             else:
                 print("\n¡Has ganado por", motivo, "!")
             print("Presiona ESPACIO para jugar de nuevo")
-            return
+            return True
+        if not self.ia.obtener_todos_movimientos(self.tablero, self.turno_actual):
+            self.ganador = (None, "sin movimientos")
+            print("\nTablas: no quedan movimientos legales")
+            print("Presiona ESPACIO para jugar de nuevo")
+            return True
+        return False
 
-    def dibujar_indicador_turno(self):
-        """Dibuja el indicador de turno actual debajo de los tableros"""
+    def texto_indicador_turno(self):
+        """Texto del indicador de turno; mientras la IA piensa, los puntos avanzan cada PASO_PENSANDO_MS"""
         jugador_actual = "IA (Negras)" if self.turno_actual == Color.NEGRO else "Jugador (Blancas)"
         texto = f"Turno actual: {jugador_actual}"
+        if self.busqueda_ia:
+            puntos = '.' * (pygame.time.get_ticks() // self.PASO_PENSANDO_MS % 3 + 1)
+            texto += f" - Pensando{puntos:3} (ESC para mover ya)"
+        return texto
+
+    def dibujar_indicador_turno(self):
+        """
+        Dibuja el indicador de turno actual debajo de los tableros si su texto
+        ha cambiado, borrando antes el anterior.
+        :return: Los rectángulos modificados.
+        """
+        texto = self.texto_indicador_turno()
+        if self.indicador_dibujado and self.indicador_dibujado[0] == texto:
+            return []
         texto_surface = self.font.render(texto, True, self.COLOR_TEXTO)
         
         # Centrar el texto debajo de los tableros
@@ -350,13 +482,44 @@ class JuegoAlice:
             texto_surface.get_width() + 2*padding, 
             texto_surface.get_height() + 2*padding
         )
+        rectangulos = [fondo_rect]
+        if self.indicador_dibujado:
+            anterior = self.indicador_dibujado[1]
+            self.pantalla.blit(self.capa_estatica, anterior, anterior)
+            rectangulos.append(anterior)
         pygame.draw.rect(self.pantalla, self.COLOR_PANEL, fondo_rect)
         self.pantalla.blit(texto_surface, (x, y))
+        self.indicador_dibujado = (texto, fondo_rect)
+        return rectangulos
+
+    def iniciar_turno_ia(self):
+        """
+        Lanza la búsqueda de la IA en segundo plano sobre una copia del tablero.
+        ejecutar() recoge el resultado cuando está listo.
+        """
+        self.cancelacion_ia = threading.Event()
+        self.busqueda_ia = self.hilo_ia.submit(self.ia.obtener_mejor_movimiento,
+                                               self.tablero.copiar_tablero(), self.cancelacion_ia)
+
+    def cancelar_turno_ia(self):
+        """Detiene la búsqueda en curso y descarta su resultado"""
+        if self.busqueda_ia:
+            self.cancelacion_ia.set()
+            self.busqueda_ia.result()
+            self.busqueda_ia = None
+            self.cancelacion_ia = None
 
-    def manejar_turno_ia(self):
-        """Maneja el turno de la IA Y la animación"""
+    def salir(self):
+        """Cierra la ventana deteniendo antes la búsqueda de la IA"""
+        self.cancelar_turno_ia()
+        self.hilo_ia.shutdown()
+        self.ia.cerrar()
+        pygame.quit()
+        sys.exit()
+
+    def manejar_turno_ia(self, mejor_movimiento):
+        """Aplica el movimiento elegido por la IA con su animación"""
         if self.turno_actual == self.ia.color:
-            mejor_movimiento = self.ia.obtener_mejor_movimiento(self.tablero)
             if mejor_movimiento:
                 tablero_origen, desde_pos, hasta_pos = mejor_movimiento
                 # Verificar si hay captura antes de mover
@@ -386,7 +549,7 @@ class JuegoAlice:
         frames_totales = int(FPS * DURACION_ANIMACION)
         
         # Obtener posiciones iniciales y finales en píxeles
-        offset_x = self.OFFSET_X if tablero_num == 1 else self.OFFSET_X + self.TAMANO_CASILLA * 8 + self.ESPACIO_ENTRE_TABLEROS
+        offset_x = self.offset_tablero(tablero_num)
         
         x1 = offset_x + desde_pos[1] * self.TAMANO_CASILLA
         y1 = desde_pos[0] * self.TAMANO_CASILLA
@@ -409,56 +572,36 @@ class JuegoAlice:
             x_actual = x1 + (x2 - x1) * progreso
             y_actual = y1 + (y2 - y1) * progreso
             
-            # Redibujar el tablero
-            self.dibujar_tablero()
+            # Redibujar lo que ha cambiado, incluidas las casillas que tapaba la pieza
+            rectangulos = self.dibujar_tablero()
             
             # Dibujar la pieza en su posición actual
-            self.pantalla.blit(imagen_pieza, (x_actual, y_actual))
+            rect_pieza = pygame.Rect(round(x_actual), round(y_actual), self.TAMANO_CASILLA, self.TAMANO_CASILLA)
+            self.pantalla.blit(imagen_pieza, rect_pieza)
+            rectangulos.append(rect_pieza)
+            self.invalidar_casillas(rect_pieza)
             
-            pygame.display.flip()
+            pygame.display.update(rectangulos)
             reloj.tick(FPS)
 
     def verificar_victoria(self):
         """Verifica si hay un ganador por captura del rey o jaque"""
-        # Verificar si algún rey ha sido capturado
-        reyes_blancos = self.contar_reyes(Color.BLANCO)
-        reyes_negros = self.contar_reyes(Color.NEGRO)
-        
-        if reyes_blancos == 0:
-            self.ganador = ("Negras", "captura")
+        victoria = self.tablero.verificar_victoria()
+        if victoria:
+            color, motivo = victoria
+            self.ganador = ("Blancas" if color == Color.BLANCO else "Negras", motivo)
             return True
-        elif reyes_negros == 0:
-            self.ganador = ("Blancas", "captura")
-            return True
-        
-        # Verificar jaque
-        for tablero_num in [1, 2]:
-            for fila in range(8):
-                for columna in range(8):
-                    pieza = self.tablero.obtener_pieza(tablero_num, fila, columna)
-                    if pieza and pieza[0] == Pieza.REY:
-                        if self.tablero.esta_en_jaque(fila, columna, tablero_num):
-                            if pieza[1] == Color.BLANCO:
-                                self.ganador = ("Negras", "jaque")
-                                return True
-                            else:
-                                self.ganador = ("Blancas", "jaque")
-                                return True
         return False
         
     def contar_reyes(self, color):
         """Cuenta cuántos reyes quedan de un color específico"""
-        contador = 0
-        for tablero_num in [1, 2]:
-            for fila in range(8):
-                for columna in range(8):
-                    pieza = self.tablero.obtener_pieza(tablero_num, fila, columna)
-                    if pieza and pieza[0] == Pieza.REY and pieza[1] == color:
-                        contador += 1
-        return contador
+        return self.tablero.contar_reyes(color)
         
     def mostrar_mensaje_victoria(self):
-        """Muestra el mensaje de victoria y la opción de reiniciar"""
+        """
+        Muestra el mensaje de victoria y la opción de reiniciar.
+        :return: El rectángulo del mensaje.
+        """
         if self.ganador:
             color, motivo = self.ganador
             if color == "Negras":
@@ -466,7 +609,9 @@ class JuegoAlice:
             else:
                 mensaje_ganador = "¡Has ganado"
             
-            if motivo == "captura":
+            if color is None:  # Tablas
+                mensaje = "¡Tablas! No quedan movimientos legales"
+            elif motivo == "captura":
                 mensaje = f"{mensaje_ganador} por captura del rey!"
             else:  # jaque
                 mensaje = f"{mensaje_ganador} por jaque!"
@@ -495,9 +640,11 @@ class JuegoAlice:
                               (pos_x + (ancho - texto_victoria.get_width())//2, pos_y + 10))
             self.pantalla.blit(texto_reiniciar, 
                               (pos_x + (ancho - texto_reiniciar.get_width())//2, pos_y + texto_victoria.get_height() + 20))
+            return pygame.Rect(pos_x, pos_y, ancho, altura_total + 30)
 
     def reiniciar_juego(self):
         """Reinicia el juego a su estado inicial"""
+        self.cancelar_turno_ia()
         self.tablero = TableroAlice()
         self.pieza_seleccionada = None
         self.tablero_seleccionado = None
@@ -506,6 +653,7 @@ class JuegoAlice:
         self.ganador = None
         self.piezas_capturadas_blancas = []
         self.piezas_capturadas_negras = []
+        self.redibujar_todo = True
 
 
 if __name__ == "__main__":
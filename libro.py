@@ -0,0 +1,182 @@
+"""
+Libro de aperturas binario: registros de 12 bytes ordenados por la clave
+Zobrist de la posición, con el formato '<QHH' (clave, movimiento codificado
+con tablero.codificar_movimiento y peso). El archivo se abre con mmap y se
+consulta por búsqueda binaria, así que abrirlo no lee nada del disco.
+
+Uso:
+    python libro.py construir autojuego.jsonl --salida libro.bin --medias-jugadas 12
+    python libro.py construir partidas.bin          (formato de partidas.py)
+    python libro.py consultar --fen "<tablero1> <tablero2> w KQkq"
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from collections import defaultdict
+
+from tablero import TableroAlice, codificar_movimiento, decodificar_movimiento, notacion, leer_notacion
+from partidas import leer_partidas
+
+
+REGISTRO = struct.Struct('<QHH')
+PESO_MAXIMO = 0xFFFF
+
+
+class LibroAperturas:
+    """Consulta de un libro de aperturas en disco mediante mmap"""
+    def __init__(self, ruta):
+        """
+        :param ruta: Archivo del libro. Si no existe o está vacío, el libro no
+                     tiene entradas.
+        """
+        self.ruta = ruta
+        self._archivo = None
+        self._datos = None
+        self.registros = 0
+        if os.path.exists(ruta) and os.path.getsize(ruta) >= REGISTRO.size:
+            self._archivo = open(ruta, 'rb')
+            self._datos = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+            self.registros = len(self._datos) // REGISTRO.size
+
+    def cerrar(self):
+        if self._datos is not None:
+            self._datos.close()
+            self._archivo.close()
+            self._datos = None
+            self._archivo = None
+            self.registros = 0
+
+    def _clave(self, indice):
+        return struct.unpack_from('<Q', self._datos, indice * REGISTRO.size)[0]
+
+    def buscar(self, clave):
+        """Devuelve la lista de (movimiento, peso) guardada para una clave Zobrist"""
+        # Primer registro con una clave mayor o igual
+        inferior, superior = 0, self.registros
+        while inferior < superior:
+            medio = (inferior + superior) // 2
+            if self._clave(medio) < clave:
+                inferior = medio + 1
+            else:
+                superior = medio
+        entradas = []
+        for indice in range(inferior, self.registros):
+            clave_registro, codigo, peso = REGISTRO.unpack_from(self._datos, indice * REGISTRO.size)
+            if clave_registro != clave:
+                break
+            entradas.append((decodificar_movimiento(codigo), peso))
+        return entradas
+
+    def elegir(self, tablero, movimientos_legales, generador=None):
+        """
+        Elige un movimiento del libro para la posición.
+        :param movimientos_legales: Los movimientos legales de la posición; las
+                                    entradas que no estén entre ellos se ignoran.
+        :param generador: random.Random opcional para elegir en proporción al
+                          peso; sin él se elige el movimiento de más peso.
+        :return: Un movimiento o None si la posición no está en el libro.
+        """
+        entradas = [(movimiento, peso) for movimiento, peso in self.buscar(tablero.hash)
+                    if peso > 0 and movimiento in movimientos_legales]
+        if not entradas:
+            return None
+        if generador is None:
+            return max(entradas, key=lambda entrada: entrada[1])[0]
+        return generador.choices([m for m, _ in entradas], weights=[p for _, p in entradas])[0]
+
+
+def escribir_libro(pesos, ruta):
+    """
+    Escribe un libro a partir de un diccionario {(clave, movimiento): peso}.
+    :return: El número de registros escritos.
+    """
+    registros = sorted((clave, codificar_movimiento(movimiento), min(peso, PESO_MAXIMO))
+                       for (clave, movimiento), peso in pesos.items() if peso > 0)
+    with open(ruta, 'wb') as archivo:
+        for registro in registros:
+            archivo.write(REGISTRO.pack(*registro))
+    return len(registros)
+
+
+def recolectar_partidas(partidas, medias_jugadas, clase_tablero=TableroAlice):
+    """
+    Acumula pesos de libro a partir de partidas registradas. Cada partida es
+    una lista de movimientos, un resultado ('1-0', '0-1' o '1/2-1/2') y el
+    número de movimientos de apertura impuesta. Esos movimientos no los
+    eligió ningún jugador, así que solo se reproducen para llegar a la
+    posición; cada uno de los siguientes medias_jugadas movimientos suma 2 si
+    el bando que lo jugó ganó, 1 en tablas y 0 si perdió.
+    :return: Un diccionario {(clave, movimiento): peso}.
+    """
+    puntos = {'1-0': (2, 0), '0-1': (0, 2), '1/2-1/2': (1, 1)}
+    pesos = defaultdict(int)
+    for movimientos, resultado, apertura in partidas:
+        tablero = clase_tablero()
+        for indice, movimiento in enumerate(movimientos[:apertura + medias_jugadas]):
+            clave = tablero.hash
+            color = tablero.turno
+            if not tablero.realizar_movimiento(movimiento):
+                break
+            if indice >= apertura:
+                pesos[(clave, movimiento)] += puntos[resultado][color.value]
+    return pesos
+
+
+def leer_autojuego(ruta):
+    """Lee las partidas de un archivo JSONL de autojuego.py como (movimientos, resultado, apertura)"""
+    with open(ruta) as archivo:
+        for linea in archivo:
+            if linea.strip():
+                partida = json.loads(linea)
+                movimientos = [leer_notacion(texto) for texto in partida['apertura'] + partida['movimientos']]
+                yield movimientos, partida['resultado'], len(partida['apertura'])
+
+
+def leer_binario(ruta):
+    """Lee las partidas de un archivo de partidas.py que empiezan en la posición inicial"""
+    for partida in leer_partidas(ruta):
+        if partida['fen'] is None:
+            yield partida['movimientos'], partida['resultado'], partida['apertura']
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Libro de aperturas del ajedrez de Alicia")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    construir = subcomandos.add_parser('construir', help="Construir el libro a partir de partidas de autojuego")
+    construir.add_argument('partidas', nargs='+',
+                           help="Archivos JSONL de autojuego.py o binarios (.bin) de partidas.py")
+    construir.add_argument('--salida', default='libro.bin')
+    construir.add_argument('--medias-jugadas', type=int, default=12,
+                           help="Movimientos de cada partida (medias jugadas, sin contar la apertura "
+                                "aleatoria) que entran en el libro")
+    consultar = subcomandos.add_parser('consultar', help="Mostrar las entradas del libro para una posición")
+    consultar.add_argument('--libro', default='libro.bin')
+    consultar.add_argument('--fen', help="Posición (por defecto la de partida)")
+    args = parser.parse_args(argumentos)
+
+    if args.comando == 'construir':
+        pesos = defaultdict(int)
+        for ruta in args.partidas:
+            partidas = leer_binario(ruta) if ruta.endswith('.bin') else leer_autojuego(ruta)
+            for clave, peso in recolectar_partidas(partidas, args.medias_jugadas).items():
+                pesos[clave] += peso
+        registros = escribir_libro(pesos, args.salida)
+        print(f"{registros} registros escritos en {args.salida} ({registros * REGISTRO.size} bytes)")
+        return 0
+
+    libro = LibroAperturas(args.libro)
+    tablero = TableroAlice.desde_fen(args.fen) if args.fen else TableroAlice()
+    entradas = libro.buscar(tablero.hash)
+    for movimiento, peso in sorted(entradas, key=lambda entrada: -entrada[1]):
+        print(f"{notacion(movimiento)}: {peso}")
+    if not entradas:
+        print("La posición no está en el libro")
+    libro.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Formato binario compacto para archivar partidas. Cada movimiento ocupa 2
+bytes (tablero.codificar_movimiento) y cada partida lleva una cabecera
+pequeña, de modo que un archivo se puede leer partida a partida sin cargarlo
+entero.
+
+Archivo:
+    'ALIC' y un byte de versión
+    partidas una detrás de otra, cada una con:
+        cabecera '<BBBHHH': resultado (índice en RESULTADOS), bytes del nombre
+                            de las blancas, bytes del de las negras, bytes de
+                            la posición inicial en FEN (0 para la de partida),
+                            número de movimientos y cuántos de ellos son una
+                            apertura impuesta (la aleatoria de autojuego.py)
+        los dos nombres y la posición, en UTF-8
+        los movimientos, '<H' cada uno
+    La versión 1 no guardaba la apertura impuesta; al leerla se toma como 0.
+
+Uso:
+    python partidas.py convertir autojuego.jsonl --salida partidas.bin
+    python partidas.py resumen partidas.bin
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+from collections import Counter
+
+from tablero import TableroAlice, codificar_movimiento, decodificar_movimiento, leer_notacion
+
+
+MAGIA = b'ALIC'
+VERSION = 2
+CABECERA = struct.Struct('<BBBHHH')
+CABECERAS = {1: struct.Struct('<BBBHH'), 2: CABECERA}
+RESULTADOS = ['*', '1-0', '0-1', '1/2-1/2']
+MAXIMO_NOMBRE = 255
+MAXIMO_MOVIMIENTOS = 0xFFFF
+
+
+class EscritorPartidas:
+    """Escribe partidas en un archivo binario, al final del existente si se pide"""
+    def __init__(self, ruta, anadir=False):
+        """
+        :param ruta: Archivo de salida.
+        :param anadir: Añadir las partidas a un archivo existente en lugar de
+                       sobrescribirlo.
+        """
+        self.ruta = ruta
+        if anadir and os.path.exists(ruta) and os.path.getsize(ruta) > 0:
+            with open(ruta, 'rb') as archivo:
+                if _leer_cabecera_archivo(archivo) != VERSION:
+                    raise ValueError(f"{ruta} usa una versión anterior del formato; escribe las partidas en otro archivo")
+            self._archivo = open(ruta, 'ab')
+        else:
+            self._archivo = open(ruta, 'wb')
+            self._archivo.write(MAGIA + bytes([VERSION]))
+        self.partidas = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+    def escribir(self, movimientos, resultado='*', blancas='', negras='', fen=None, apertura=0):
+        """
+        Escribe una partida.
+        :param movimientos: Lista de movimientos (tablero, (fila, col), (fila, col)).
+        :param resultado: Uno de RESULTADOS.
+        :param blancas: Nombre del jugador de blancas (hasta 255 bytes en UTF-8).
+        :param negras: Nombre del jugador de negras.
+        :param fen: Posición inicial (TableroAlice.a_fen), o None para la de partida.
+        :param apertura: Cuántos de los primeros movimientos no los eligieron
+                         los jugadores (la apertura aleatoria de autojuego.py).
+        """
+        if len(movimientos) > MAXIMO_MOVIMIENTOS:
+            raise ValueError(f"Una partida no puede tener más de {MAXIMO_MOVIMIENTOS} movimientos")
+        if not 0 <= apertura <= len(movimientos):
+            raise ValueError("La apertura no puede tener más movimientos que la partida")
+        nombre_blancas = _recortar(blancas)
+        nombre_negras = _recortar(negras)
+        posicion = fen.encode('utf-8') if fen else b''
+        self._archivo.write(CABECERA.pack(RESULTADOS.index(resultado), len(nombre_blancas),
+                                          len(nombre_negras), len(posicion), len(movimientos), apertura))
+        self._archivo.write(nombre_blancas + nombre_negras + posicion)
+        self._archivo.write(struct.pack(f'<{len(movimientos)}H',
+                                        *[codificar_movimiento(movimiento) for movimiento in movimientos]))
+        self.partidas += 1
+
+
+def _recortar(nombre):
+    """Codifica un nombre en UTF-8 con MAXIMO_NOMBRE bytes como mucho, sin partir caracteres"""
+    return nombre.encode('utf-8')[:MAXIMO_NOMBRE].decode('utf-8', errors='ignore').encode('utf-8')
+
+
+def _leer_cabecera_archivo(archivo):
+    """Comprueba la cabecera del archivo y devuelve su versión"""
+    cabecera = archivo.read(len(MAGIA) + 1)
+    if cabecera[:len(MAGIA)] != MAGIA:
+        raise ValueError(f"{archivo.name} no es un archivo de partidas")
+    if cabecera[len(MAGIA)] not in CABECERAS:
+        raise ValueError(f"Versión de archivo de partidas no soportada: {cabecera[len(MAGIA)]}")
+    return cabecera[len(MAGIA)]
+
+
+def _leer_exacto(archivo, n):
+    datos = archivo.read(n)
+    if len(datos) != n:
+        raise ValueError(f"{archivo.name}: partida incompleta al final del archivo")
+    return datos
+
+
+def leer_partidas(ruta):
+    """
+    Itera las partidas de un archivo leyendo una cada vez.
+    :return: Un generador de diccionarios con 'resultado', 'blancas',
+             'negras', 'fen' (None para la posición de partida), 'movimientos'
+             y 'apertura' (movimientos iniciales impuestos).
+    """
+    with open(ruta, 'rb') as archivo:
+        formato = CABECERAS[_leer_cabecera_archivo(archivo)]
+        while True:
+            cabecera = archivo.read(formato.size)
+            if not cabecera:
+                return
+            if len(cabecera) != formato.size:
+                raise ValueError(f"{ruta}: partida incompleta al final del archivo")
+            resultado, bytes_blancas, bytes_negras, bytes_fen, n, *apertura = formato.unpack(cabecera)
+            textos = _leer_exacto(archivo, bytes_blancas + bytes_negras + bytes_fen)
+            codigos = struct.unpack(f'<{n}H', _leer_exacto(archivo, 2 * n))
+            yield {
+                'resultado': RESULTADOS[resultado],
+                'blancas': textos[:bytes_blancas].decode('utf-8'),
+                'negras': textos[bytes_blancas:bytes_blancas + bytes_negras].decode('utf-8'),
+                'fen': textos[bytes_blancas + bytes_negras:].decode('utf-8') or None,
+                'movimientos': [decodificar_movimiento(codigo) for codigo in codigos],
+                'apertura': apertura[0] if apertura else 0,
+            }
+
+
+def reproducir(partida, clase_tablero=TableroAlice):
+    """
+    Recorre las posiciones de una partida sobre un único tablero.
+    :return: Un generador de (tablero, movimiento) con el tablero justo antes
+             de cada movimiento; el movimiento se aplica al pedir el siguiente.
+    """
+    tablero = clase_tablero.desde_fen(partida['fen']) if partida['fen'] else clase_tablero()
+    for movimiento in partida['movimientos']:
+        yield tablero, movimiento
+        if not tablero.realizar_movimiento(movimiento):
+            raise ValueError(f"Movimiento imposible en la partida: {movimiento}")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Archivo binario de partidas del ajedrez de Alicia")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    convertir = subcomandos.add_parser('convertir', help="Convertir partidas de autojuego.py al formato binario")
+    convertir.add_argument('partidas', nargs='+', help="Archivos JSONL de autojuego.py")
+    convertir.add_argument('--salida', default='partidas.bin')
+    convertir.add_argument('--anadir', action='store_true', help="Añadir al archivo de salida existente")
+    resumen = subcomandos.add_parser('resumen', help="Contar las partidas, movimientos y resultados de un archivo")
+    resumen.add_argument('archivo')
+    args = parser.parse_args(argumentos)
+
+    if args.comando == 'convertir':
+        with EscritorPartidas(args.salida, anadir=args.anadir) as escritor:
+            for ruta in args.partidas:
+                with open(ruta) as archivo:
+                    for linea in archivo:
+                        if not linea.strip():
+                            continue
+                        partida = json.loads(linea)
+                        movimientos = [leer_notacion(texto) for texto in partida['apertura'] + partida['movimientos']]
+                        blancas, negras = ('A', 'B') if partida['blancas'] == 'A' else ('B', 'A')
+                        escritor.escribir(movimientos, partida['resultado'], blancas, negras,
+                                          apertura=len(partida['apertura']))
+        print(f"{escritor.partidas} partidas escritas en {args.salida} ({os.path.getsize(args.salida)} bytes)")
+        return 0
+
+    partidas = 0
+    movimientos = 0
+    resultados = Counter()
+    for partida in leer_partidas(args.archivo):
+        partidas += 1
+        movimientos += len(partida['movimientos'])
+        resultados[partida['resultado']] += 1
+    print(f"{partidas} partidas, {movimientos} movimientos, {os.path.getsize(args.archivo)} bytes")
+    for resultado in RESULTADOS:
+        if resultados[resultado]:
+            print(f"{resultado}: {resultados[resultado]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Perft para el ajedrez de Alicia: cuenta las posiciones hoja que se alcanzan
+desde una posición a una profundidad dada, usando IA.obtener_todos_movimientos
+(movimientos legales) y TableroAlice.realizar_movimiento. Sirve para medir el
+generador de movimientos y detectar cambios en las reglas entre tableros.
+
+Uso:
+    python perft.py --profundidad 3
+    python perft.py --fen "<tablero1> <tablero2> w KQkq" --profundidad 2 --dividir
+    python perft.py --suite
+"""
+import argparse
+import sys
+import time
+
+from IA import IA
+from constantes import Color
+from tablero import notacion
+from tablero_bitboard import BACKENDS
+
+# Posiciones de referencia: (nombre, FEN, {profundidad: nodos esperados})
+POSICIONES = [
+    ('inicial',
+     'rnbkqbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBKQBNR 8/8/8/8/8/8/8/8 w KQkq',
+     {1: 20, 2: 400, 3: 9618, 4: 231730}),
+    ('apertura',
+     'r1bkqb1r/ppp2ppp/8/4p3/8/8/PP1P1PPP/RNBK1BNR 8/8/2n2n2/3p4/4P3/2P5/8/4Q3 w KQkq',
+     {1: 39, 2: 1668, 3: 63822}),
+    ('enroque',
+     'r2k3r/ppp2ppp/8/8/8/8/PPP2PPP/R2K3R 8/2n1q3/8/8/8/8/2N1Q3/8 w KQkq',
+     {1: 44, 2: 1841, 3: 77247}),
+    ('medio juego',
+     'r3k2r/pp3ppp/2n5/8/3P4/5N2/PP3PPP/R3K2R 2b5/4q3/8/2p5/8/2B5/4Q3/8 b KQkq',
+     {1: 51, 2: 2566, 3: 117394}),
+    ('final',
+     '8/3k4/8/8/8/8/4P3/4K3 8/8/8/3r4/8/8/8/3R4 w -',
+     {1: 14, 2: 251, 3: 3874, 4: 64986}),
+]
+
+
+def perft(tablero, profundidad, generador):
+    """Cuenta las posiciones hoja a la profundidad indicada"""
+    movimientos = generador.obtener_todos_movimientos(tablero, tablero.turno)
+    if profundidad == 1:
+        return len(movimientos)
+    nodos = 0
+    for movimiento in movimientos:
+        registro = tablero.realizar_movimiento(movimiento)
+        if registro:
+            nodos += perft(tablero, profundidad - 1, generador)
+            tablero.deshacer_movimiento(registro)
+    return nodos
+
+
+def dividir(tablero, profundidad, generador):
+    """Devuelve una lista (movimiento, nodos) con el perft de cada movimiento raíz"""
+    resultados = []
+    for movimiento in generador.obtener_todos_movimientos(tablero, tablero.turno):
+        registro = tablero.realizar_movimiento(movimiento)
+        if registro:
+            nodos = perft(tablero, profundidad - 1, generador) if profundidad > 1 else 1
+            tablero.deshacer_movimiento(registro)
+            resultados.append((movimiento, nodos))
+    return resultados
+
+
+def ejecutar_suite(clase_tablero, generador, profundidad_maxima):
+    """Compara cada posición de referencia con los nodos esperados"""
+    correcto = True
+    for nombre, fen, esperados in POSICIONES:
+        for profundidad, esperado in sorted(esperados.items()):
+            if profundidad > profundidad_maxima:
+                continue
+            tablero = clase_tablero.desde_fen(fen)
+            inicio = time.perf_counter()
+            nodos = perft(tablero, profundidad, generador)
+            duracion = time.perf_counter() - inicio
+            estado = 'OK' if nodos == esperado else 'FALLO'
+            if nodos != esperado:
+                correcto = False
+            print(f"{estado:5} {nombre:12} profundidad {profundidad}: {nodos} "
+                  f"(esperado {esperado}) {nodos / max(duracion, 1e-9):,.0f} nodos/s")
+    return correcto
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Perft para el ajedrez de Alicia")
+    parser.add_argument('--fen', help="Posición inicial (por defecto la de partida)")
+    parser.add_argument('--profundidad', type=int, default=3)
+    parser.add_argument('--dividir', action='store_true', help="Mostrar el perft de cada movimiento raíz")
+    parser.add_argument('--suite', action='store_true', help="Comprobar las posiciones de referencia")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='listas')
+    args = parser.parse_args(argumentos)
+
+    clase_tablero = BACKENDS[args.backend]
+    # obtener_todos_movimientos no depende del color ni de la tabla de transposición
+    generador = IA(Color.BLANCO, memoria_tt_mb=0)
+
+    if args.suite:
+        return 0 if ejecutar_suite(clase_tablero, generador, args.profundidad) else 1
+
+    tablero = clase_tablero.desde_fen(args.fen) if args.fen else clase_tablero()
+    inicio = time.perf_counter()
+    if args.dividir:
+        resultados = dividir(tablero, args.profundidad, generador)
+        for movimiento, nodos in resultados:
+            print(f"{notacion(movimiento)}: {nodos}")
+        total = sum(nodos for _, nodos in resultados)
+    else:
+        total = perft(tablero, args.profundidad, generador)
+    duracion = time.perf_counter() - inicio
+    print(f"Nodos: {total}")
+    print(f"Tiempo: {duracion:.3f} s ({total / max(duracion, 1e-9):,.0f} nodos/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
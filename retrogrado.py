@@ -0,0 +1,295 @@
+"""
+Generación retrógrada de las tablas de finales que consulta finales.py: rey
+contra rey (KvK), rey y torre contra rey (KRvK) y rey y dama contra rey
+(KQvK), con las piezas en cualquiera de los dos tableros.
+
+Las reglas son las del juego: cada pieza pasa al otro tablero al moverse y
+pisa lo que haya en la casilla de destino (también un rey, que queda
+capturado), y gana el bando que deja al rival en jaque. Una posición sin
+movimientos legales se cuenta como tablas, como en autojuego.py. Las tablas
+no contemplan el enroque.
+
+El cálculo es una iteración hacia delante sobre todas las posiciones con
+NumPy: en la pasada n se marcan las posiciones ganadas en n jugadas (alguna
+jugada lleva a una posición perdida en n - 1) y las perdidas en n (todas las
+jugadas llevan a posiciones ganadas por el rival, la más larga en n - 1). Lo
+que no se resuelve son tablas.
+
+Uso:
+    python retrogrado.py --directorio finales
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from constantes import Pieza
+from tablero import DESTINOS_REY, RAYOS, DIRECCIONES_TORRE
+from finales import ARCHIVOS, INVALIDA, POSICIONES_PIEZA
+
+
+N_KXVK = POSICIONES_PIEZA ** 3
+
+
+def _tabla_pasos():
+    """PASOS[casilla, i]: destino del i-ésimo paso de rey desde la casilla, o -1"""
+    pasos = np.full((64, 8), -1, dtype=np.int64)
+    for casilla in range(64):
+        destinos = DESTINOS_REY[casilla // 8][casilla % 8]
+        for i, (fila, columna) in enumerate(destinos):
+            pasos[casilla, i] = fila * 8 + columna
+    return pasos
+
+
+def _tabla_rayos():
+    """RAYOS_CASILLA[casilla, direccion, k]: casilla k + 1 del rayo, o -1"""
+    rayos = np.full((64, 8, 7), -1, dtype=np.int64)
+    for casilla in range(64):
+        for direccion, rayo in enumerate(RAYOS[casilla // 8][casilla % 8]):
+            for k, (fila, columna) in enumerate(rayo):
+                rayos[casilla, direccion, k] = fila * 8 + columna
+    return rayos
+
+
+def _tabla_adyacentes():
+    """ADYACENTE[a, b]: las posiciones a y b están en el mismo tablero y a un paso de rey"""
+    adyacente = np.zeros((POSICIONES_PIEZA, POSICIONES_PIEZA), dtype=bool)
+    for a in range(POSICIONES_PIEZA):
+        for fila, columna in DESTINOS_REY[(a % 64) // 8][a % 8]:
+            adyacente[a, (a // 64) * 64 + fila * 8 + columna] = True
+    return adyacente
+
+PASOS = _tabla_pasos()
+RAYOS_CASILLA = _tabla_rayos()
+ADYACENTE = _tabla_adyacentes()
+
+
+def tabla_ataques(direcciones):
+    """
+    ATAQUES[rey, pieza, x]: el bando fuerte (rey y pieza deslizante con esas
+    direcciones) ataca la posición x. Sólo su propio rey puede cortar los
+    rayos de la pieza: el rey débil es el atacado o está en el otro tablero.
+    """
+    ataques = np.zeros((POSICIONES_PIEZA,) * 3, dtype=bool)
+    for pieza in range(POSICIONES_PIEZA):
+        tablero, casilla = divmod(pieza, 64)
+        for direccion in direcciones:
+            anteriores = []
+            for destino in RAYOS_CASILLA[casilla, direccion]:
+                if destino < 0:
+                    break
+                x = tablero * 64 + destino
+                ataques[:, pieza, x] = True
+                ataques[anteriores, pieza, x] = False
+                anteriores.append(x)
+    ataques |= ADYACENTE[:, None, :]
+    return ataques
+
+
+def _codificar(valores, validas):
+    """Pasa los valores (positivo gana, negativo pierde, 0 tablas) al byte de finales.py"""
+    tabla = np.where(valores > 0, valores, np.where(valores < 0, INVALIDA - valores, 0))
+    tabla = np.where(validas, tabla, INVALIDA)
+    return tabla.astype(np.uint8)
+
+
+class _Resultado:
+    """Acumula, para un grupo de posiciones, lo que dicen sus jugadas"""
+    def __init__(self, n):
+        self.gana_ya = np.zeros(n, dtype=bool)
+        self.alguna_legal = np.zeros(n, dtype=bool)
+        self.todas_ganan = np.ones(n, dtype=bool)
+        self.mayor = np.zeros(n, dtype=np.int64)
+        self.menor_perdida = np.zeros(n, dtype=np.int64)
+
+    def anadir(self, legal, gana, valor_rival):
+        """
+        :param legal: Jugadas legales.
+        :param gana: Jugadas que ganan en el acto (rey capturado o rival en jaque).
+        :param valor_rival: Valor de la posición siguiente para el rival.
+        """
+        self.alguna_legal |= legal
+        self.gana_ya |= gana
+        resto = legal & ~gana
+        self.todas_ganan &= ~resto | (valor_rival > 0)
+        self.mayor = np.where(resto, np.maximum(self.mayor, valor_rival), self.mayor)
+        # Pérdida más corta del rival (valores negativos): la más cercana a 0
+        perdida = resto & (valor_rival < 0)
+        actual = np.where(self.menor_perdida < 0, self.menor_perdida, np.iinfo(np.int64).min)
+        self.menor_perdida = np.where(perdida, np.maximum(actual, valor_rival), self.menor_perdida)
+
+    def valores(self):
+        """Valor de cada posición según sus jugadas, o 0 si aún no está resuelta"""
+        gana = np.where(self.menor_perdida < 0, 1 - self.menor_perdida, 0)
+        gana = np.where(self.gana_ya, 1, gana)
+        pierde = self.alguna_legal & self.todas_ganan & ~self.gana_ya & (self.mayor > 0)
+        return np.where(gana > 0, gana, np.where(pierde, -(self.mayor + 1), 0))
+
+
+def resolver(validas, jugadas, tablas, etiqueta):
+    """
+    Iteración común a todos los materiales.
+    :param validas: Lista de máscaras de posiciones válidas, una por bando que mueve.
+    :param jugadas: jugadas(lado, indices, tablas) devuelve un _Resultado con
+                    las jugadas de esas posiciones del lado que mueve.
+    :param tablas: Lista de vectores de valores (se rellenan en el sitio).
+    """
+    pasada = 0
+    while True:
+        pasada += 1
+        inicio = time.time()
+        nuevos = []
+        for lado, valores in enumerate(tablas):
+            pendientes = np.flatnonzero(validas[lado] & (valores == 0))
+            resultado = jugadas(lado, pendientes, tablas).valores()
+            # En la pasada n sólo se aceptan valores de n jugadas
+            resultado = np.where(np.abs(resultado) == pasada, resultado, 0)
+            nuevos.append((pendientes, resultado))
+        cambios = 0
+        for (pendientes, resultado), valores in zip(nuevos, tablas):
+            valores[pendientes] = resultado
+            cambios += int(np.count_nonzero(resultado))
+        print(f"{etiqueta}: pasada {pasada}, {cambios} posiciones resueltas ({time.time() - inicio:.1f}s)")
+        if cambios == 0:
+            return
+
+
+def resolver_kvk():
+    """
+    Rey contra rey, índice rey que mueve * 128 + rey rival. Un rey gana si
+    puede pasar a la casilla del rival en el otro tablero.
+    """
+    indices = np.arange(POSICIONES_PIEZA * POSICIONES_PIEZA)
+    mueve, rival = np.divmod(indices, POSICIONES_PIEZA)
+    validas = (mueve != rival) & ~ADYACENTE[mueve, rival]
+    valores = np.zeros(len(indices), dtype=np.int64)
+
+    def jugadas(lado, pendientes, tablas):
+        a, b = np.divmod(pendientes, POSICIONES_PIEZA)
+        resultado = _Resultado(len(pendientes))
+        for paso in range(8):
+            destino = PASOS[a % 64, paso]
+            en_tablero = destino >= 0
+            origen = (a // 64) * 64 + destino
+            llegada = (1 - a // 64) * 64 + destino
+            legal = en_tablero & (b != origen) & ~ADYACENTE[b, np.where(en_tablero, llegada, 0)]
+            gana = legal & (b == llegada)
+            siguiente = np.where(legal, b * POSICIONES_PIEZA + llegada, 0)
+            resultado.anadir(legal, gana, tablas[0][siguiente])
+        return resultado
+
+    resolver([validas], jugadas, [valores], 'KvK')
+    return _codificar(valores, validas)
+
+
+def resolver_kxvk(tipo, kvk):
+    """
+    Rey y torre o dama contra rey. Lado 0: mueve el bando fuerte; lado 1: el
+    débil. Índice rey fuerte * 128 ** 2 + pieza * 128 + rey débil.
+    :param kvk: Valores de rey contra rey (para cuando la pieza desaparece).
+    """
+    direcciones = DIRECCIONES_TORRE if tipo == Pieza.TORRE else range(8)
+    ataques = tabla_ataques(direcciones)
+    cuadrado = POSICIONES_PIEZA * POSICIONES_PIEZA
+
+    indices = np.arange(N_KXVK)
+    rey, pieza, debil = indices // cuadrado, (indices // POSICIONES_PIEZA) % POSICIONES_PIEZA, indices % POSICIONES_PIEZA
+    validas_comun = ((rey != pieza) & (rey != debil) & (pieza != debil) &
+                     ~ataques[rey, pieza, debil] & ~ADYACENTE[debil, rey])
+    del indices, rey, pieza, debil
+    validas = [validas_comun, validas_comun]
+    tablas = [np.zeros(N_KXVK, dtype=np.int64), np.zeros(N_KXVK, dtype=np.int64)]
+
+    def jugadas_fuerte(pendientes, tablas):
+        rey, pieza, debil = (pendientes // cuadrado, (pendientes // POSICIONES_PIEZA) % POSICIONES_PIEZA,
+                             pendientes % POSICIONES_PIEZA)
+        resultado = _Resultado(len(pendientes))
+        tablero_rey = rey // 64
+        for paso in range(8):
+            destino = PASOS[rey % 64, paso]
+            en_tablero = destino >= 0
+            destino = np.where(en_tablero, destino, 0)
+            origen = tablero_rey * 64 + destino
+            llegada = (1 - tablero_rey) * 64 + destino
+            legal = en_tablero & (pieza != origen) & (debil != origen) & ~ADYACENTE[debil, llegada]
+            captura_rey = debil == llegada
+            sin_pieza = pieza == llegada
+            gana = legal & (captura_rey | (~sin_pieza & ataques[llegada, pieza, debil]))
+            valor = np.where(sin_pieza, kvk[debil * POSICIONES_PIEZA + llegada],
+                             tablas[1][(llegada * POSICIONES_PIEZA + pieza) * POSICIONES_PIEZA + debil])
+            resultado.anadir(legal, gana, valor)
+
+        tablero_pieza = pieza // 64
+        for direccion in direcciones:
+            bloqueado = np.zeros(len(pendientes), dtype=bool)
+            for k in range(7):
+                destino = RAYOS_CASILLA[pieza % 64, direccion, k]
+                en_rayo = (destino >= 0) & ~bloqueado
+                if not en_rayo.any():
+                    break
+                destino = np.where(destino >= 0, destino, 0)
+                origen = tablero_pieza * 64 + destino
+                llegada = (1 - tablero_pieza) * 64 + destino
+                legal = en_rayo & (rey != origen) & (rey != llegada)
+                bloqueado |= (rey == origen) | (debil == origen)
+                gana = legal & ((debil == origen) | (debil == llegada) | ataques[rey, llegada, debil])
+                valor = tablas[1][(rey * POSICIONES_PIEZA + llegada) * POSICIONES_PIEZA + debil]
+                resultado.anadir(legal, gana, valor)
+        return resultado
+
+    def jugadas_debil(pendientes, tablas):
+        rey, pieza, debil = (pendientes // cuadrado, (pendientes // POSICIONES_PIEZA) % POSICIONES_PIEZA,
+                             pendientes % POSICIONES_PIEZA)
+        resultado = _Resultado(len(pendientes))
+        tablero_debil = debil // 64
+        for paso in range(8):
+            destino = PASOS[debil % 64, paso]
+            en_tablero = destino >= 0
+            destino = np.where(en_tablero, destino, 0)
+            origen = tablero_debil * 64 + destino
+            llegada = (1 - tablero_debil) * 64 + destino
+            legal = en_tablero & (rey != origen) & ~ataques[rey, pieza, llegada]
+            gana = legal & (rey == llegada)
+            sin_pieza = (pieza == origen) | (pieza == llegada)
+            valor = np.where(sin_pieza, kvk[rey * POSICIONES_PIEZA + llegada],
+                             tablas[0][(rey * POSICIONES_PIEZA + pieza) * POSICIONES_PIEZA + llegada])
+            resultado.anadir(legal, gana, valor)
+        return resultado
+
+    def jugadas(lado, pendientes, tablas):
+        if lado == 0:
+            return jugadas_fuerte(pendientes, tablas)
+        return jugadas_debil(pendientes, tablas)
+
+    resolver(validas, jugadas, tablas, ARCHIVOS[tipo][:-4])
+    return np.concatenate([_codificar(tablas[0], validas[0]), _codificar(tablas[1], validas[1])])
+
+
+def valores_kvk(tabla):
+    """Devuelve los valores con signo de una tabla KvK codificada (imposibles como 0)"""
+    tabla = tabla.astype(np.int64)
+    return np.where(tabla > INVALIDA, INVALIDA - tabla, np.where(tabla == INVALIDA, 0, tabla))
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Genera las tablas de finales del ajedrez de Alicia")
+    parser.add_argument('--directorio', default='finales')
+    parser.add_argument('--materiales', nargs='+', default=['KvK', 'KRvK', 'KQvK'],
+                        choices=['KvK', 'KRvK', 'KQvK'])
+    args = parser.parse_args(argumentos)
+
+    os.makedirs(args.directorio, exist_ok=True)
+    kvk = resolver_kvk()
+    tipos = {'KRvK': Pieza.TORRE, 'KQvK': Pieza.DAMA}
+    for material in args.materiales:
+        tabla = kvk if material == 'KvK' else resolver_kxvk(tipos[material], valores_kvk(kvk))
+        ruta = os.path.join(args.directorio, material + '.bin')
+        tabla.tofile(ruta)
+        print(f"{ruta}: {len(tabla)} posiciones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,103 @@
-import copy
-from enum import Enum
+import random
 from constantes import *
 
 
-class Pieza(Enum):
-    PEON = 1
-    CABALLO = 2
-    ALFIL = 3
-    TORRE = 4
-    DAMA = 5
-    REY = 6
+# Claves Zobrist: una por (tablero, color, pieza, casilla), más el turno y
+# las banderas de enroque. La semilla fija hace que las claves sean estables
+# entre ejecuciones.
+_generador = random.Random(20240917)
+ZOBRIST_PIEZAS = [None] + [
+    [[None] + [[_generador.getrandbits(64) for _ in range(64)] for _ in range(6)] for _ in Color]
+    for _ in range(2)
+]
+ZOBRIST_TURNO = _generador.getrandbits(64)
+ZOBRIST_REY_MOVIDO = [_generador.getrandbits(64) for _ in Color]
+ZOBRIST_TORRE_MOVIDA = [
+    {'kingside': _generador.getrandbits(64), 'queenside': _generador.getrandbits(64)} for _ in Color
+]
+
+
+# Valor posicional de cada (color, pieza, casilla) según TABLAS_POSICION;
+# las negras usan la tabla reflejada verticalmente
+VALOR_POSICION = [
+    [None] + [[TABLAS_POSICION[pieza][fila if color == Color.BLANCO else 7 - fila][columna]
+               for fila in range(8) for columna in range(8)]
+              for pieza in Pieza]
+    for color in Color
+]
+VALOR_MATERIAL = [None] + [VALORES_PIEZAS[pieza] for pieza in Pieza]
+
+# Tablas de movimientos precalculadas por casilla, indexadas [fila][columna]
+def _destinos(fila, columna, desplazamientos):
+    return [(fila + df, columna + dc) for df, dc in desplazamientos
+            if 0 <= fila + df < 8 and 0 <= columna + dc < 8]
+
+DESPLAZAMIENTOS_CABALLO = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                           (1, -2), (1, 2), (2, -1), (2, 1)]
+DESPLAZAMIENTOS_REY = [(-1, -1), (-1, 0), (-1, 1),
+                       (0, -1),           (0, 1),
+                       (1, -1),  (1, 0),  (1, 1)]
+# Las cuatro primeras direcciones son de torre y las cuatro últimas de alfil
+DIRECCIONES = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+DIRECCIONES_TORRE = [0, 1, 2, 3]
+DIRECCIONES_ALFIL = [4, 5, 6, 7]
+
+DESTINOS_CABALLO = [[_destinos(f, c, DESPLAZAMIENTOS_CABALLO) for c in range(8)] for f in range(8)]
+DESTINOS_REY = [[_destinos(f, c, DESPLAZAMIENTOS_REY) for c in range(8)] for f in range(8)]
+# RAYOS[fila][columna][direccion]: casillas de la dirección, de la más cercana a la más lejana
+RAYOS = [[[_destinos(f, c, [(df * k, dc * k) for k in range(1, 8)]) for df, dc in DIRECCIONES]
+          for c in range(8)] for f in range(8)]
+# ATACANTES_PEON[color][fila][columna]: casillas desde las que un peón rival
+# atacaría una pieza de ese color
+ATACANTES_PEON = [
+    [[_destinos(f, c, [(-1, -1), (-1, 1)]) for c in range(8)] for f in range(8)],  # Blanco
+    [[_destinos(f, c, [(1, -1), (1, 1)]) for c in range(8)] for f in range(8)],  # Negro
+]
+
+# Letras de las piezas en notación FEN (mayúsculas para las blancas)
+LETRAS_PIEZAS = {
+    Pieza.PEON: 'p',
+    Pieza.CABALLO: 'n',
+    Pieza.ALFIL: 'b',
+    Pieza.TORRE: 'r',
+    Pieza.DAMA: 'q',
+    Pieza.REY: 'k'
+}
+PIEZAS_LETRAS = {letra: pieza for pieza, letra in LETRAS_PIEZAS.items()}
+
+
+def codificar_movimiento(movimiento):
+    """
+    Codifica un movimiento en un entero de 13 bits que cabe en 2 bytes:
+    tablero (1 bit), casilla de origen (6 bits) y casilla de destino (6 bits).
+    """
+    tablero_num, (desde_fila, desde_col), (hasta_fila, hasta_col) = movimiento
+    return (tablero_num - 1) << 12 | (desde_fila * 8 + desde_col) << 6 | (hasta_fila * 8 + hasta_col)
+
+
+def decodificar_movimiento(codigo):
+    """Inversa de codificar_movimiento"""
+    return ((codigo >> 12) + 1, divmod(codigo >> 6 & 63, 8), divmod(codigo & 63, 8))
+
+
+def notacion(movimiento):
+    """Texto legible de un movimiento, por ejemplo 1:e2e4"""
+    tablero_num, (desde_fila, desde_col), (hasta_fila, hasta_col) = movimiento
+    letras = 'abcdefgh'
+    numeros = '87654321'
+    return (f"{tablero_num}:{letras[desde_col]}{numeros[desde_fila]}"
+            f"{letras[hasta_col]}{numeros[hasta_fila]}")
+
+
+def leer_notacion(texto):
+    """Inversa de notacion: convierte "1:e2e4" en (1, (6, 4), (4, 4))"""
+    tablero_num, casillas = texto.split(':')
+    letras = 'abcdefgh'
+    numeros = '87654321'
+    return (int(tablero_num),
+            (numeros.index(casillas[1]), letras.index(casillas[0])),
+            (numeros.index(casillas[3]), letras.index(casillas[2])))
 
-class Color(Enum):
-    BLANCO = 0
-    NEGRO = 1
 
 class TableroAlice:
     def __init__(self):
@@ -59,8 +143,89 @@ class TableroAlice:
         
         # Historial de movimientos
         self.historial_movimientos = []
+        
+        # Color que mueve
+        self.turno = Color.BLANCO
+        self._recalcular_estado()
+
+    def _recalcular_estado(self):
+        """
+        Recalcula desde cero la información que realizar_movimiento mantiene de
+        forma incremental: la clave Zobrist, la clave de los peones de cada
+        tablero, la posición de cada rey y, por color, las casillas ocupadas,
+        el material, el valor posicional y el número de peones en cada columna
+        de cada tablero.
+        """
+        self.hash = self.calcular_hash()
+        # hash_peones[tablero_num]: clave Zobrist de los peones de ambos colores en ese tablero
+        self.hash_peones = [None, 0, 0]
+        self._reyes = [None, None]
+        # casillas_color[tablero_num][color.value]: casilla (fila * 8 + columna) -> (fila, columna)
+        # de cada pieza de ese color, en el orden en que se colocaron
+        self.casillas_color = [None] + [[{} for _ in Color] for _ in range(2)]
+        self.material = [0, 0]
+        self.posicional = [0, 0]
+        self.peones_columna = [None] + [[[0] * 8 for _ in Color] for _ in range(2)]
+        for tablero_num in [1, 2]:
+            for fila in range(8):
+                for columna in range(8):
+                    pieza = self.obtener_pieza(tablero_num, fila, columna)
+                    if pieza:
+                        color = pieza[1].value
+                        self.casillas_color[tablero_num][color][fila * 8 + columna] = (fila, columna)
+                        self.material[color] += VALOR_MATERIAL[pieza[0].value]
+                        self.posicional[color] += VALOR_POSICION[color][pieza[0].value][fila * 8 + columna]
+                        if pieza[0] == Pieza.PEON:
+                            self.peones_columna[tablero_num][color][columna] += 1
+                            self.hash_peones[tablero_num] ^= \
+                                ZOBRIST_PIEZAS[tablero_num][color][Pieza.PEON.value][fila * 8 + columna]
+                        elif pieza[0] == Pieza.REY:
+                            self._reyes[color] = (tablero_num, fila, columna)
+
+    @property
+    def reyes(self):
+        """
+        Posición (tablero, fila, columna) del rey de cada color, indexada por
+        Color.value, o None si el rey ha sido capturado.
+        """
+        return self._reyes
+
+    def casillas_ocupadas(self, tablero_num, color):
+        """
+        Devuelve las posiciones (fila, columna) de las piezas de un color en un
+        tablero, en el orden en que se colocaron (no el de un recorrido por
+        filas). El orden es siempre el mismo para la misma secuencia de
+        movimientos, que es lo que necesita la ordenación de la búsqueda.
+        """
+        return list(self.casillas_color[tablero_num][color.value].values())
+
+    def calcular_hash(self):
+        """
+        Calcula desde cero la clave Zobrist de la posición. realizar_movimiento
+        la mantiene de forma incremental en self.hash.
+        """
+        clave = 0
+        for tablero_num in [1, 2]:
+            for fila in range(8):
+                for columna in range(8):
+                    pieza = self.obtener_pieza(tablero_num, fila, columna)
+                    if pieza:
+                        clave ^= ZOBRIST_PIEZAS[tablero_num][pieza[1].value][pieza[0].value][fila * 8 + columna]
+        for color in Color:
+            if self.reyes_movidos[color]:
+                clave ^= ZOBRIST_REY_MOVIDO[color.value]
+            for lado, movida in self.torres_movidas[color].items():
+                if movida:
+                    clave ^= ZOBRIST_TORRE_MOVIDA[color.value][lado]
+        if self.turno == Color.NEGRO:
+            clave ^= ZOBRIST_TURNO
+        return clave
 
     def realizar_movimiento(self, movimiento):
+        """
+        Realiza un movimiento y devuelve un registro para deshacerlo con
+        deshacer_movimiento, o False si no hay pieza en la casilla de origen.
+        """
         tablero_origen, desde_pos, hasta_pos = movimiento
         desde_fila, desde_col = desde_pos
         hasta_fila, hasta_col = hasta_pos
@@ -77,59 +242,116 @@ class TableroAlice:
         # Verificar si es enroque
         es_enroque = (pieza[0] == Pieza.REY and abs(desde_col - hasta_col) == 2)
         
+        # Estado previo necesario para deshacer el movimiento
+        torres = self.torres_movidas[pieza[1]]
+        registro = (movimiento, pieza[1], [], self.reyes_movidos[pieza[1]],
+                    torres['kingside'], torres['queenside'], self.hash)
+        cambios = registro[2]
+        
         if es_enroque:
             # Mover el rey
-            if tablero_origen == 1:
-                self.tablero1[desde_fila][desde_col] = None
-                self.tablero1[hasta_fila][hasta_col] = pieza
-                # Mover la torre
-                if hasta_col == 6:  # Enroque corto
-                    self.tablero1[desde_fila][7] = None
-                    self.tablero1[desde_fila][5] = (Pieza.TORRE, pieza[1])
-                else:  # Enroque largo
-                    self.tablero1[desde_fila][0] = None
-                    self.tablero1[desde_fila][3] = (Pieza.TORRE, pieza[1])
-            else:
-                self.tablero2[desde_fila][desde_col] = None
-                self.tablero2[hasta_fila][hasta_col] = pieza
-                # Mover la torre
-                if hasta_col == 6:  # Enroque corto
-                    self.tablero2[desde_fila][7] = None
-                    self.tablero2[desde_fila][5] = (Pieza.TORRE, pieza[1])
-                else:  # Enroque largo
-                    self.tablero2[desde_fila][0] = None
-                    self.tablero2[desde_fila][3] = (Pieza.TORRE, pieza[1])
+            cambios.append((tablero_origen, desde_fila, desde_col,
+                            self._colocar_pieza(tablero_origen, desde_fila, desde_col, None)))
+            cambios.append((tablero_origen, hasta_fila, hasta_col,
+                            self._colocar_pieza(tablero_origen, hasta_fila, hasta_col, pieza)))
+            # Mover la torre
+            if hasta_col == 6:  # Enroque corto
+                col_torre, col_torre_destino = 7, 5
+            else:  # Enroque largo
+                col_torre, col_torre_destino = 0, 3
+            cambios.append((tablero_origen, desde_fila, col_torre,
+                            self._colocar_pieza(tablero_origen, desde_fila, col_torre, None)))
+            cambios.append((tablero_origen, desde_fila, col_torre_destino,
+                            self._colocar_pieza(tablero_origen, desde_fila, col_torre_destino,
+                                                (Pieza.TORRE, pieza[1]))))
         else:
             # Para cualquier movimiento (incluyendo capturas)
             tablero_destino = 2 if tablero_origen == 1 else 1
             
             # Limpiar posición original en el tablero de origen
-            if tablero_origen == 1:
-                self.tablero1[desde_fila][desde_col] = None
-                # Realizar el movimiento en el tablero destino
-                self.tablero2[hasta_fila][hasta_col] = pieza
-                # Si es captura, limpiar la pieza capturada en el otro tablero
-                if es_captura:
-                    self.tablero1[hasta_fila][hasta_col] = None
-            else:
-                self.tablero2[desde_fila][desde_col] = None
-                # Realizar el movimiento en el tablero destino
-                self.tablero1[hasta_fila][hasta_col] = pieza
-                # Si es captura, limpiar la pieza capturada en el otro tablero
-                if es_captura:
-                    self.tablero2[hasta_fila][hasta_col] = None
+            cambios.append((tablero_origen, desde_fila, desde_col,
+                            self._colocar_pieza(tablero_origen, desde_fila, desde_col, None)))
+            # Realizar el movimiento en el tablero destino
+            cambios.append((tablero_destino, hasta_fila, hasta_col,
+                            self._colocar_pieza(tablero_destino, hasta_fila, hasta_col, pieza)))
+            # Si es captura, limpiar la pieza capturada en el otro tablero
+            if es_captura:
+                cambios.append((tablero_origen, hasta_fila, hasta_col,
+                                self._colocar_pieza(tablero_origen, hasta_fila, hasta_col, None)))
         
         # Actualizar historial y estado de piezas especiales
         self.historial_movimientos.append((tablero_origen, desde_pos, hasta_pos))
         if pieza[0] == Pieza.REY:
-            self.reyes_movidos[pieza[1]] = True
+            if not self.reyes_movidos[pieza[1]]:
+                self.reyes_movidos[pieza[1]] = True
+                self.hash ^= ZOBRIST_REY_MOVIDO[pieza[1].value]
         elif pieza[0] == Pieza.TORRE:
-            if desde_col == 0:
-                self.torres_movidas[pieza[1]]['queenside'] = True
-            elif desde_col == 7:
-                self.torres_movidas[pieza[1]]['kingside'] = True
+            lado = 'queenside' if desde_col == 0 else 'kingside' if desde_col == 7 else None
+            if lado and not torres[lado]:
+                torres[lado] = True
+                self.hash ^= ZOBRIST_TORRE_MOVIDA[pieza[1].value][lado]
+        
+        # Pasar el turno al rival
+        self.turno = Color.NEGRO if self.turno == Color.BLANCO else Color.BLANCO
+        self.hash ^= ZOBRIST_TURNO
                     
-        return True
+        return registro
+
+    def deshacer_movimiento(self, registro):
+        """
+        Deshace un movimiento a partir del registro devuelto por realizar_movimiento:
+        restaura la pieza capturada, el traslado entre tableros, la torre del
+        enroque, las banderas de reyes_movidos y torres_movidas, el turno y
+        la clave Zobrist.
+        """
+        _, color, cambios, rey_movido, torre_corta, torre_larga, clave = registro
+        for tablero_num, fila, columna, pieza_anterior in reversed(cambios):
+            self._colocar_pieza(tablero_num, fila, columna, pieza_anterior)
+        
+        self.reyes_movidos[color] = rey_movido
+        self.torres_movidas[color]['kingside'] = torre_corta
+        self.torres_movidas[color]['queenside'] = torre_larga
+        self.historial_movimientos.pop()
+        self.turno = Color.NEGRO if self.turno == Color.BLANCO else Color.BLANCO
+        self.hash = clave
+
+    def _colocar_pieza(self, tablero_num, fila, columna, pieza):
+        """
+        Coloca una pieza (o None para vaciar la casilla) en el tablero indicado
+        y devuelve la pieza que ocupaba la casilla. Todas las escrituras de
+        realizar_movimiento pasan por aquí para que otras representaciones
+        del tablero puedan mantenerse sincronizadas.
+        """
+        tablero = self.tablero1 if tablero_num == 1 else self.tablero2
+        anterior = tablero[fila][columna]
+        tablero[fila][columna] = pieza
+        
+        # Actualizar la clave Zobrist y los totales de evaluación de forma incremental
+        claves = ZOBRIST_PIEZAS[tablero_num]
+        casilla = fila * 8 + columna
+        if anterior:
+            color = anterior[1].value
+            del self.casillas_color[tablero_num][color][casilla]
+            self.hash ^= claves[color][anterior[0].value][casilla]
+            self.material[color] -= VALOR_MATERIAL[anterior[0].value]
+            self.posicional[color] -= VALOR_POSICION[color][anterior[0].value][casilla]
+            if anterior[0] == Pieza.PEON:
+                self.peones_columna[tablero_num][color][columna] -= 1
+                self.hash_peones[tablero_num] ^= claves[color][Pieza.PEON.value][casilla]
+            elif anterior[0] == Pieza.REY and self._reyes[color] == (tablero_num, fila, columna):
+                self._reyes[color] = None
+        if pieza:
+            color = pieza[1].value
+            self.casillas_color[tablero_num][color][casilla] = (fila, columna)
+            self.hash ^= claves[color][pieza[0].value][casilla]
+            self.material[color] += VALOR_MATERIAL[pieza[0].value]
+            self.posicional[color] += VALOR_POSICION[color][pieza[0].value][casilla]
+            if pieza[0] == Pieza.PEON:
+                self.peones_columna[tablero_num][color][columna] += 1
+                self.hash_peones[tablero_num] ^= claves[color][Pieza.PEON.value][casilla]
+            elif pieza[0] == Pieza.REY:
+                self._reyes[color] = (tablero_num, fila, columna)
+        return anterior
 
     def obtener_pieza(self, tablero_num, fila, columna):
         """
@@ -199,14 +421,12 @@ class TableroAlice:
             # Movimiento hacia adelante
             if 0 <= fila + direccion < 8:
                 if self.obtener_pieza(tablero_num, fila + direccion, columna) is None:
-                    if not self.hay_pieza_en_camino((fila, columna), (fila + direccion, columna), tablero_num):
-                        movimientos.append((fila + direccion, columna))
-                        
-                        # Movimiento doble inicial
-                        if ((direccion == -1 and fila == 6) or (direccion == 1 and fila == 1)):
-                            if self.obtener_pieza(tablero_num, fila + 2*direccion, columna) is None:
-                                if not self.hay_pieza_en_camino((fila, columna), (fila + 2*direccion, columna), tablero_num):
-                                    movimientos.append((fila + 2*direccion, columna))
+                    movimientos.append((fila + direccion, columna))
+                    
+                    # Movimiento doble inicial (la casilla intermedia ya está vacía)
+                    if ((direccion == -1 and fila == 6) or (direccion == 1 and fila == 1)):
+                        if self.obtener_pieza(tablero_num, fila + 2*direccion, columna) is None:
+                            movimientos.append((fila + 2*direccion, columna))
             
             # Capturas diagonales
             for dc in [-1, 1]:
@@ -217,66 +437,47 @@ class TableroAlice:
                         
         elif tipo_pieza == Pieza.CABALLO:
             # El caballo puede saltar, así que no necesita verificación de piezas en el camino
-            movimientos_caballo = [
-                (-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                (1, -2), (1, 2), (2, -1), (2, 1)
-            ]
-            for df, dc in movimientos_caballo:
-                nueva_fila = fila + df
-                nueva_col = columna + dc
-                if 0 <= nueva_fila < 8 and 0 <= nueva_col < 8:
-                    pieza_destino = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
-                    if pieza_destino is None:
-                        # Verificar tablero espejo para movimientos normales
-                        tablero_espejo = 2 if tablero_num == 1 else 1
-                        if self.obtener_pieza(tablero_espejo, nueva_fila, nueva_col) is None:
-                            movimientos.append((nueva_fila, nueva_col))
-                    elif pieza_destino[1] != color_actual:
-                        movimientos_captura.append((nueva_fila, nueva_col))
+            tablero_espejo = 2 if tablero_num == 1 else 1
+            for nueva_fila, nueva_col in DESTINOS_CABALLO[fila][columna]:
+                pieza_destino = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
+                if pieza_destino is None:
+                    # Verificar tablero espejo para movimientos normales
+                    if self.obtener_pieza(tablero_espejo, nueva_fila, nueva_col) is None:
+                        movimientos.append((nueva_fila, nueva_col))
+                elif pieza_destino[1] != color_actual:
+                    movimientos_captura.append((nueva_fila, nueva_col))
 
         elif tipo_pieza in [Pieza.ALFIL, Pieza.TORRE, Pieza.DAMA]:
             direcciones = []
             if tipo_pieza in [Pieza.TORRE, Pieza.DAMA]:
-                direcciones.extend([(0, 1), (0, -1), (1, 0), (-1, 0)])
+                direcciones.extend(DIRECCIONES_TORRE)
             if tipo_pieza in [Pieza.ALFIL, Pieza.DAMA]:
-                direcciones.extend([(1, 1), (1, -1), (-1, 1), (-1, -1)])
-                
-            for df, dc in direcciones:
-                nueva_fila = fila + df
-                nueva_col = columna + dc
-                while 0 <= nueva_fila < 8 and 0 <= nueva_col < 8:
-                    if not self.hay_pieza_en_camino((fila, columna), (nueva_fila, nueva_col), tablero_num):
-                        pieza_destino = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
-                        if pieza_destino is None:
-                            movimientos.append((nueva_fila, nueva_col))
-                        elif pieza_destino[1] != color_actual:
-                            movimientos_captura.append((nueva_fila, nueva_col))
-                            break
-                        else:
-                            break
+                direcciones.extend(DIRECCIONES_ALFIL)
+            
+            # Cada rayo se recorre una sola vez, hasta la primera pieza
+            rayos = RAYOS[fila][columna]
+            for direccion in direcciones:
+                for nueva_fila, nueva_col in rayos[direccion]:
+                    pieza_destino = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
+                    if pieza_destino is None:
+                        movimientos.append((nueva_fila, nueva_col))
                     else:
+                        if pieza_destino[1] != color_actual:
+                            movimientos_captura.append((nueva_fila, nueva_col))
                         break
-                    nueva_fila += df
-                    nueva_col += dc
 
         elif tipo_pieza == Pieza.REY:
-            # Movimientos normales del rey
-            direcciones = [
-                (-1, -1), (-1, 0), (-1, 1),
-                (0, -1),           (0, 1),
-                (1, -1),  (1, 0),  (1, 1)
-            ]
-            for df, dc in direcciones:
-                nueva_fila = fila + df
-                nueva_col = columna + dc
-                if 0 <= nueva_fila < 8 and 0 <= nueva_col < 8:
-                    pieza_destino = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
-                    if pieza_destino is None:
-                        if not self.esta_casilla_bajo_ataque(nueva_fila, nueva_col, tablero_num, color_actual):
-                            movimientos.append((nueva_fila, nueva_col))
-                    elif pieza_destino[1] != color_actual:
-                        if not self.esta_casilla_bajo_ataque(nueva_fila, nueva_col, tablero_num, color_actual):
-                            movimientos_captura.append((nueva_fila, nueva_col))
+            # Movimientos normales del rey. El rey termina en el otro tablero,
+            # así que la casilla destino debe ser segura en ese tablero
+            tablero_destino = 3 - tablero_num
+            for nueva_fila, nueva_col in DESTINOS_REY[fila][columna]:
+                pieza_destino = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
+                if pieza_destino is None:
+                    if not self.esta_casilla_bajo_ataque(nueva_fila, nueva_col, tablero_destino, color_actual):
+                        movimientos.append((nueva_fila, nueva_col))
+                elif pieza_destino[1] != color_actual:
+                    if not self.esta_casilla_bajo_ataque(nueva_fila, nueva_col, tablero_destino, color_actual):
+                        movimientos_captura.append((nueva_fila, nueva_col))
 
             # Verificar enroque si el rey no se ha movido
             if not self.reyes_movidos[color_actual]:
@@ -320,6 +521,180 @@ class TableroAlice:
         
         return movimientos + movimientos_captura
 
+    def capturas_pieza(self, tipo_pieza, pos, tablero_num):
+        """
+        Devuelve solo los destinos de captura de movimientos_pieza, en el mismo
+        orden, sin generar los movimientos a casillas vacías.
+        """
+        fila, columna = pos
+        capturas = []
+        pieza_actual = self.obtener_pieza(tablero_num, fila, columna)
+        if not pieza_actual:
+            return capturas
+        color_actual = pieza_actual[1]
+
+        if tipo_pieza == Pieza.PEON:
+            direccion = -1 if color_actual == Color.BLANCO else 1
+            for dc in [-1, 1]:
+                if 0 <= fila + direccion < 8 and 0 <= columna + dc < 8:
+                    pieza_destino = self.obtener_pieza(tablero_num, fila + direccion, columna + dc)
+                    if pieza_destino and pieza_destino[1] != color_actual:
+                        capturas.append((fila + direccion, columna + dc))
+
+        elif tipo_pieza == Pieza.CABALLO:
+            for nueva_fila, nueva_col in DESTINOS_CABALLO[fila][columna]:
+                pieza_destino = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
+                if pieza_destino and pieza_destino[1] != color_actual:
+                    capturas.append((nueva_fila, nueva_col))
+
+        elif tipo_pieza in [Pieza.ALFIL, Pieza.TORRE, Pieza.DAMA]:
+            direcciones = []
+            if tipo_pieza in [Pieza.TORRE, Pieza.DAMA]:
+                direcciones.extend(DIRECCIONES_TORRE)
+            if tipo_pieza in [Pieza.ALFIL, Pieza.DAMA]:
+                direcciones.extend(DIRECCIONES_ALFIL)
+            rayos = RAYOS[fila][columna]
+            for direccion in direcciones:
+                for nueva_fila, nueva_col in rayos[direccion]:
+                    pieza_destino = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
+                    if pieza_destino:
+                        if pieza_destino[1] != color_actual:
+                            capturas.append((nueva_fila, nueva_col))
+                        break
+
+        elif tipo_pieza == Pieza.REY:
+            for nueva_fila, nueva_col in DESTINOS_REY[fila][columna]:
+                pieza_destino = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
+                if (pieza_destino and pieza_destino[1] != color_actual and
+                        not self.esta_casilla_bajo_ataque(nueva_fila, nueva_col, 3 - tablero_num, color_actual)):
+                    capturas.append((nueva_fila, nueva_col))
+
+        return capturas
+
+    def analizar_rey(self, color):
+        """
+        Calcula una vez por posición lo necesario para decidir qué movimientos
+        de un color dejan a su rey a salvo (ver es_movimiento_legal). En el
+        ajedrez de Alicia la pieza que mueve abandona siempre su tablero, así
+        que una pieza clavada solo puede capturar a la que la clava, un jaque
+        solo se tapa con una pieza que llega desde el otro tablero, y capturar
+        una pieza rival que tapa a un deslizante rival también descubre el rey.
+        :return: None si el color no tiene rey, o una tupla (tablero del rey,
+                 casilla del rey, máscara de jaques de peón, caballo y rey,
+                 direcciones con jaque de un deslizante, rayos, dirección de
+                 cada casilla de los rayos, máscara de casillas que resuelven
+                 todos los jaques al ocuparlas desde el otro tablero). Cada rayo
+                 guarda sus tres primeras piezas como (casilla, es deslizante rival).
+        """
+        posicion = self._reyes[color.value]
+        if posicion is None:
+            return None
+        tablero_rey, fila, columna = posicion
+        rival = Color.NEGRO if color == Color.BLANCO else Color.BLANCO
+
+        # Jaques que no dependen de la ocupación: peones, caballos y rey rivales.
+        # bloqueos acumula las casillas que resuelven cada jaque al ocuparlas
+        jaques_fijos = 0
+        bloqueos = ~0
+        for casillas, tipo in [(ATACANTES_PEON[color.value][fila][columna], Pieza.PEON),
+                               (DESTINOS_CABALLO[fila][columna], Pieza.CABALLO),
+                               (DESTINOS_REY[fila][columna], Pieza.REY)]:
+            for nueva_fila, nueva_col in casillas:
+                if self.obtener_pieza(tablero_rey, nueva_fila, nueva_col) == (tipo, rival):
+                    jaques_fijos |= 1 << (nueva_fila * 8 + nueva_col)
+                    bloqueos &= 1 << (nueva_fila * 8 + nueva_col)
+
+        # Las tres primeras piezas de cada rayo bastan: un movimiento retira
+        # como mucho dos piezas del tablero del rey (el origen y la captura)
+        rayos = []
+        direccion_casilla = {}
+        direcciones_jaque = []
+        for direccion, rayo in enumerate(RAYOS[fila][columna]):
+            tipos = (Pieza.TORRE, Pieza.DAMA) if direccion in DIRECCIONES_TORRE else (Pieza.ALFIL, Pieza.DAMA)
+            piezas = []
+            camino = 0
+            for nueva_fila, nueva_col in rayo:
+                casilla = nueva_fila * 8 + nueva_col
+                if not piezas:
+                    camino |= 1 << casilla
+                pieza = self.obtener_pieza(tablero_rey, nueva_fila, nueva_col)
+                if pieza:
+                    piezas.append((casilla, pieza[1] == rival and pieza[0] in tipos))
+                    direccion_casilla[casilla] = direccion
+                    if len(piezas) == 3:
+                        break
+            rayos.append(piezas)
+            if piezas and piezas[0][1]:
+                # Jaque de un deslizante: se resuelve ocupando el camino o su casilla
+                direcciones_jaque.append(direccion)
+                bloqueos &= camino
+        return (tablero_rey, fila * 8 + columna, jaques_fijos, direcciones_jaque,
+                rayos, direccion_casilla, bloqueos)
+
+    def es_movimiento_legal(self, movimiento, analisis):
+        """
+        Verifica, sin realizarlo, que un movimiento generado por movimientos_pieza
+        no deje al propio rey atacado ni lo pise con una pieza propia.
+        :param analisis: Resultado de analizar_rey para el color que mueve.
+        """
+        if analisis is None:
+            # Sin rey la partida ha terminado: no quedan movimientos legales
+            return False
+        tablero_num, (desde_fila, desde_col), (hasta_fila, hasta_col) = movimiento
+        pieza = self.obtener_pieza(tablero_num, desde_fila, desde_col)
+        if pieza[0] == Pieza.REY:
+            color = pieza[1]
+            fila_rey = 7 if color == Color.BLANCO else 0
+            if (max(abs(hasta_fila - desde_fila), abs(hasta_col - desde_col)) == 1 and
+                    (self.reyes_movidos[color] or desde_fila == fila_rey or
+                     hasta_fila != fila_rey or hasta_col not in (2, 6))):
+                # Los pasos normales ya se comprueban en movimientos_pieza, salvo
+                # que el mismo destino lo haya añadido el código del enroque
+                return True
+            if desde_col == 4 and abs(hasta_col - desde_col) == 2:
+                # El enroque se queda en el mismo tablero y sus casillas ya se
+                # comprueban al generarlo
+                return True
+            # Cualquier otro movimiento del rey termina en el otro tablero
+            return not self.esta_casilla_bajo_ataque(hasta_fila, hasta_col, 3 - tablero_num, color)
+
+        tablero_rey, casilla_rey, jaques_fijos, direcciones_jaque, rayos, direccion_casilla, bloqueos = analisis
+        hasta = hasta_fila * 8 + hasta_col
+        if tablero_num != tablero_rey:
+            # La pieza llega al tablero del rey: no puede pisarlo y debe
+            # capturar o tapar todos los jaques
+            return hasta != casilla_rey and bool(bloqueos >> hasta & 1)
+
+        # La pieza sale del tablero del rey junto con la pieza capturada, si la hay
+        desde = desde_fila * 8 + desde_col
+        retiradas = [desde]
+        if self.obtener_pieza(tablero_num, hasta_fila, hasta_col):
+            retiradas.append(hasta)
+            if jaques_fijos & ~(1 << hasta):
+                return False
+        elif jaques_fijos:
+            return False
+        afectadas = {direccion_casilla[casilla] for casilla in retiradas if casilla in direccion_casilla}
+        for direccion in direcciones_jaque:
+            if direccion not in afectadas:
+                return False
+        for direccion in afectadas:
+            for casilla, deslizante_rival in rayos[direccion]:
+                if casilla not in retiradas:
+                    if deslizante_rival:
+                        return False
+                    break
+        return True
+
+    def movimientos_legales_pieza(self, tipo_pieza, pos, tablero_num):
+        """movimientos_pieza sin los destinos que dejarían al propio rey atacado"""
+        pieza = self.obtener_pieza(tablero_num, pos[0], pos[1])
+        if not pieza:
+            return []
+        analisis = self.analizar_rey(pieza[1])
+        return [destino for destino in self.movimientos_pieza(tipo_pieza, pos, tablero_num)
+                if self.es_movimiento_legal((tablero_num, pos, destino), analisis)]
+
     def esta_en_jaque(self, fila, columna, tablero_num):
         """
         Verifica si el rey en la posición dada está en jaque
@@ -331,6 +706,37 @@ class TableroAlice:
         color_rey = pieza[1]
         return self.esta_casilla_bajo_ataque(fila, columna, tablero_num, color_rey)
 
+    def rey_en_jaque(self, color):
+        """Verifica si el rey del color indicado está en jaque en su tablero"""
+        posicion = self._reyes[color.value]
+        if posicion is None:
+            return False
+        tablero_num, fila, columna = posicion
+        return self.esta_casilla_bajo_ataque(fila, columna, tablero_num, color)
+
+    def contar_reyes(self, color):
+        """Cuenta cuántos reyes quedan de un color específico"""
+        return 0 if self._reyes[color.value] is None else 1
+
+    def verificar_victoria(self):
+        """
+        Verifica si hay un ganador por captura del rey o jaque.
+        :return: Una tupla (color ganador, 'captura' o 'jaque'), o None si la partida sigue.
+        """
+        # Verificar si algún rey ha sido capturado
+        if self._reyes[Color.BLANCO.value] is None:
+            return Color.NEGRO, "captura"
+        if self._reyes[Color.NEGRO.value] is None:
+            return Color.BLANCO, "captura"
+
+        # Verificar jaque: el bando en jaque pierde. Si ambos lo están, decide
+        # el primer rey en orden de tablero, fila y columna
+        for posicion, color in sorted((self._reyes[color.value], color) for color in Color):
+            if self.rey_en_jaque(color):
+                ganador = Color.NEGRO if color == Color.BLANCO else Color.BLANCO
+                return ganador, "jaque"
+        return None
+
     def esta_casilla_bajo_ataque(self, fila, columna, tablero_num, color_defensor):
         """
         Verifica si una casilla está bajo ataque por piezas del color opuesto
@@ -338,61 +744,117 @@ class TableroAlice:
         color_atacante = Color.NEGRO if color_defensor == Color.BLANCO else Color.BLANCO
         
         # Verificar ataques de peón
-        direcciones_peon = [(-1, -1), (-1, 1)] if color_defensor == Color.BLANCO else [(1, -1), (1, 1)]
-        for df, dc in direcciones_peon:
-            nueva_fila, nueva_col = fila + df, columna + dc
-            if 0 <= nueva_fila < 8 and 0 <= nueva_col < 8:
-                pieza = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
-                if pieza and pieza[0] == Pieza.PEON and pieza[1] == color_atacante:
-                    return True
+        for nueva_fila, nueva_col in ATACANTES_PEON[color_defensor.value][fila][columna]:
+            pieza = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
+            if pieza and pieza[0] == Pieza.PEON and pieza[1] == color_atacante:
+                return True
 
         # Verificar ataques de caballo
-        movimientos_caballo = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                             (1, -2), (1, 2), (2, -1), (2, 1)]
-        for df, dc in movimientos_caballo:
-            nueva_fila, nueva_col = fila + df, columna + dc
-            if 0 <= nueva_fila < 8 and 0 <= nueva_col < 8:
-                pieza = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
-                if pieza and pieza[0] == Pieza.CABALLO and pieza[1] == color_atacante:
-                    return True
+        for nueva_fila, nueva_col in DESTINOS_CABALLO[fila][columna]:
+            pieza = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
+            if pieza and pieza[0] == Pieza.CABALLO and pieza[1] == color_atacante:
+                return True
 
         # Verificar ataques en líneas rectas y diagonales (torre, alfil, dama)
-        direcciones = [(0, 1), (0, -1), (1, 0), (-1, 0),  # Direcciones de torre
-                      (-1, -1), (-1, 1), (1, -1), (1, 1)] # Direcciones de alfil
-        for df, dc in direcciones:
-            nueva_fila, nueva_col = fila + df, columna + dc
-            while 0 <= nueva_fila < 8 and 0 <= nueva_col < 8:
+        rayos = RAYOS[fila][columna]
+        for direccion in range(8):
+            atacantes = (Pieza.TORRE, Pieza.DAMA) if direccion < 4 else (Pieza.ALFIL, Pieza.DAMA)
+            for nueva_fila, nueva_col in rayos[direccion]:
                 pieza = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
                 if pieza:
-                    if pieza[1] == color_atacante:
-                        # Verificar si la pieza puede atacar en esta dirección
-                        if (df, dc) in [(0, 1), (0, -1), (1, 0), (-1, 0)]:  # Direcciones de torre
-                            if pieza[0] in [Pieza.TORRE, Pieza.DAMA]:
-                                return True
-                        else:  # Direcciones diagonales
-                            if pieza[0] in [Pieza.ALFIL, Pieza.DAMA]:
-                                return True
+                    if pieza[1] == color_atacante and pieza[0] in atacantes:
+                        return True
                     break
-                nueva_fila += df
-                nueva_col += dc
 
         # Verificar ataques del rey enemigo
-        direcciones_rey = [(-1, -1), (-1, 0), (-1, 1),
-                         (0, -1),            (0, 1),
-                         (1, -1),  (1, 0),   (1, 1)]
-        for df, dc in direcciones_rey:
-            nueva_fila, nueva_col = fila + df, columna + dc
-            if 0 <= nueva_fila < 8 and 0 <= nueva_col < 8:
-                pieza = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
-                if pieza and pieza[0] == Pieza.REY and pieza[1] == color_atacante:
-                    return True
+        for nueva_fila, nueva_col in DESTINOS_REY[fila][columna]:
+            pieza = self.obtener_pieza(tablero_num, nueva_fila, nueva_col)
+            if pieza and pieza[0] == Pieza.REY and pieza[1] == color_atacante:
+                return True
 
         return False
 
     def copiar_tablero(self):
-        nuevo_tablero = TableroAlice()
-        nuevo_tablero.tablero1 = copy.deepcopy(self.tablero1)
-        nuevo_tablero.tablero2 = copy.deepcopy(self.tablero2)
-        nuevo_tablero.reyes_movidos = copy.deepcopy(self.reyes_movidos)
-        nuevo_tablero.torres_movidas = copy.deepcopy(self.torres_movidas)
-        return nuevo_tablero 
\ No newline at end of file
+        nuevo_tablero = self.__class__()
+        # Las piezas son tuplas inmutables, basta con copiar las filas
+        nuevo_tablero.tablero1 = [fila[:] for fila in self.tablero1]
+        nuevo_tablero.tablero2 = [fila[:] for fila in self.tablero2]
+        nuevo_tablero.reyes_movidos = dict(self.reyes_movidos)
+        nuevo_tablero.torres_movidas = {color: dict(lados) for color, lados in self.torres_movidas.items()}
+        nuevo_tablero.turno = self.turno
+        nuevo_tablero._recalcular_estado()
+        return nuevo_tablero
+
+    def a_fen(self):
+        """
+        Describe la posición como texto: la colocación de cada tablero en
+        notación FEN, el color que mueve (w/b) y los enroques disponibles
+        (KQkq o -), separados por espacios.
+        """
+        partes = []
+        for tablero in [self.tablero1, self.tablero2]:
+            filas = []
+            for fila in tablero:
+                texto = ''
+                vacias = 0
+                for pieza in fila:
+                    if pieza is None:
+                        vacias += 1
+                        continue
+                    if vacias:
+                        texto += str(vacias)
+                        vacias = 0
+                    letra = LETRAS_PIEZAS[pieza[0]]
+                    texto += letra.upper() if pieza[1] == Color.BLANCO else letra
+                if vacias:
+                    texto += str(vacias)
+                filas.append(texto)
+            partes.append('/'.join(filas))
+        
+        partes.append('w' if self.turno == Color.BLANCO else 'b')
+        enroques = ''
+        for color, corto, largo in [(Color.BLANCO, 'K', 'Q'), (Color.NEGRO, 'k', 'q')]:
+            if not self.reyes_movidos[color]:
+                if not self.torres_movidas[color]['kingside']:
+                    enroques += corto
+                if not self.torres_movidas[color]['queenside']:
+                    enroques += largo
+        partes.append(enroques or '-')
+        return ' '.join(partes)
+
+    @classmethod
+    def desde_fen(cls, fen):
+        """Crea un tablero a partir del texto generado por a_fen"""
+        partes = fen.split()
+        if len(partes) != 4:
+            raise ValueError(f"FEN inválido: {fen}")
+        nuevo_tablero = cls()
+        for tablero_num, colocacion in [(1, partes[0]), (2, partes[1])]:
+            filas = colocacion.split('/')
+            if len(filas) != 8:
+                raise ValueError(f"FEN inválido: {fen}")
+            tablero = [[None for _ in range(8)] for _ in range(8)]
+            for fila, texto in enumerate(filas):
+                columna = 0
+                for letra in texto:
+                    if letra.isdigit():
+                        columna += int(letra)
+                    else:
+                        color = Color.BLANCO if letra.isupper() else Color.NEGRO
+                        tablero[fila][columna] = (PIEZAS_LETRAS[letra.lower()], color)
+                        columna += 1
+                if columna != 8:
+                    raise ValueError(f"FEN inválido: {fen}")
+            if tablero_num == 1:
+                nuevo_tablero.tablero1 = tablero
+            else:
+                nuevo_tablero.tablero2 = tablero
+        
+        nuevo_tablero.turno = Color.BLANCO if partes[2] == 'w' else Color.NEGRO
+        enroques = partes[3]
+        for color, corto, largo in [(Color.BLANCO, 'K', 'Q'), (Color.NEGRO, 'k', 'q')]:
+            nuevo_tablero.torres_movidas[color]['kingside'] = corto not in enroques
+            nuevo_tablero.torres_movidas[color]['queenside'] = largo not in enroques
+            nuevo_tablero.reyes_movidos[color] = corto not in enroques and largo not in enroques
+        nuevo_tablero._recalcular_estado()
+        return nuevo_tablero
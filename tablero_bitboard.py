@@ -0,0 +1,306 @@
+"""
+Tablero con bitboards: TableroBitboard genera los movimientos, detecta los
+ataques y analiza el rey con máscaras de 64 bits en lugar de recorrer las
+matrices 8x8. Las matrices se siguen manteniendo porque el resto del
+programa (evaluación, interfaz, FEN) lee las piezas con obtener_pieza, así que
+cada pieza colocada cuesta algo más que en TableroAlice.
+
+Medido en esta máquina (mejor de cinco, perft a profundidad 3 de las
+posiciones de perft.py y benchmark.py a profundidad fija) es un 10-20 % más
+rápido que TableroAlice en conjunto: algo más rápido en las posiciones con
+piezas deslizantes y finales, y algo más lento en la posición inicial, donde
+casi todo son peones y caballos. No es una mejora mayor porque la mayor parte
+del tiempo se va en el código común (es_movimiento_legal, realizar_movimiento
+y la propia búsqueda).
+"""
+from tablero import (TableroAlice, Pieza, Color, DIRECCIONES, DIRECCIONES_TORRE, DIRECCIONES_ALFIL,
+                     DESTINOS_CABALLO, DESTINOS_REY, ATACANTES_PEON, RAYOS as RAYOS_CASILLAS)
+
+
+# Las casillas se numeran como fila * 8 + columna (0 = a8, 63 = h1)
+def _mascara(casillas):
+    mascara = 0
+    for fila, columna in casillas:
+        mascara |= 1 << (fila * 8 + columna)
+    return mascara
+
+# Máscaras equivalentes a las tablas precalculadas de tablero.py, indexadas por casilla
+DIRECCION_POSITIVA = [df * 8 + dc > 0 for df, dc in DIRECCIONES]
+SALTOS_CABALLO = [_mascara(DESTINOS_CABALLO[f][c]) for f in range(8) for c in range(8)]
+PASOS_REY = [_mascara(DESTINOS_REY[f][c]) for f in range(8) for c in range(8)]
+# ATAQUES_PEON[color][casilla]: casillas atacadas por un peón de ese color, que
+# coinciden con las casillas desde las que un peón rival atacaría esa casilla
+ATAQUES_PEON = [[_mascara(por_fila[c]) for por_fila in ATACANTES_PEON[color] for c in range(8)]
+                for color in range(2)]
+# RAYOS[direccion][casilla]: casillas alcanzables en esa dirección con el tablero vacío
+RAYOS = [[_mascara(RAYOS_CASILLAS[f][c][d]) for f in range(8) for c in range(8)]
+         for d in range(len(DIRECCIONES))]
+# Rayos de torre y de alfil juntos: un deslizante fuera de ellos no puede atacar la casilla
+LINEAS_TORRE = [RAYOS[0][c] | RAYOS[1][c] | RAYOS[2][c] | RAYOS[3][c] for c in range(64)]
+LINEAS_ALFIL = [RAYOS[4][c] | RAYOS[5][c] | RAYOS[6][c] | RAYOS[7][c] for c in range(64)]
+# (fila, columna) de cada casilla, para no repetir divmod al recorrer máscaras
+COORDENADAS = [divmod(casilla, 8) for casilla in range(64)]
+# Índices de los bitboards. Enum.value es una propiedad y cuesta tanto como el
+# resto de la consulta, así que en los métodos calientes se usa _value_
+PEON, CABALLO, ALFIL, TORRE, DAMA, REY = (pieza.value for pieza in
+                                          (Pieza.PEON, Pieza.CABALLO, Pieza.ALFIL, Pieza.TORRE, Pieza.DAMA, Pieza.REY))
+
+
+def _ataques_deslizante(casilla, direcciones, ocupacion):
+    """Casillas atacadas por una pieza deslizante, deteniéndose en el primer bloqueo"""
+    ataques = 0
+    for d in direcciones:
+        rayo = RAYOS[d][casilla]
+        bloqueo = rayo & ocupacion
+        if bloqueo:
+            # La casilla bloqueada más cercana al origen es el bit más bajo en
+            # las direcciones positivas y el más alto en las negativas
+            if DIRECCION_POSITIVA[d]:
+                rayo ^= RAYOS[d][(bloqueo & -bloqueo).bit_length() - 1]
+            else:
+                rayo ^= RAYOS[d][bloqueo.bit_length() - 1]
+        ataques |= rayo
+    return ataques
+
+
+def _a_coordenadas(mascara):
+    """Convierte una máscara en una lista de posiciones (fila, columna)"""
+    posiciones = []
+    while mascara:
+        bit = mascara & -mascara
+        posiciones.append(COORDENADAS[bit.bit_length() - 1])
+        mascara ^= bit
+    return posiciones
+
+
+class TableroBitboard(TableroAlice):
+    """
+    Variante de TableroAlice que mantiene, además de las matrices 8x8,
+    un entero de 64 bits por (tablero, color, pieza) y las máscaras de
+    ocupación de cada tablero, y genera los movimientos y los ataques a partir
+    de ellas. La interfaz pública es la misma.
+    """
+    def _recalcular_estado(self):
+        self._recalcular_bitboards()
+        super()._recalcular_estado()
+
+    def _recalcular_bitboards(self):
+        # bitboards[tablero_num][color.value][pieza.value]; el índice 0 no se usa
+        self.bitboards = [None] + [[[0] * 7 for _ in Color] for _ in range(2)]
+        self.ocupacion_color = [None, [0, 0], [0, 0]]
+        self.ocupacion = [None, 0, 0]
+        for tablero_num in [1, 2]:
+            for fila in range(8):
+                for columna in range(8):
+                    pieza = self.obtener_pieza(tablero_num, fila, columna)
+                    if pieza:
+                        bit = 1 << (fila * 8 + columna)
+                        self.bitboards[tablero_num][pieza[1].value][pieza[0].value] |= bit
+                        self.ocupacion_color[tablero_num][pieza[1].value] |= bit
+            self.ocupacion[tablero_num] = self.ocupacion_color[tablero_num][0] | self.ocupacion_color[tablero_num][1]
+
+    def _colocar_pieza(self, tablero_num, fila, columna, pieza):
+        bit = 1 << (fila * 8 + columna)
+        anterior = self.obtener_pieza(tablero_num, fila, columna)
+        bitboards = self.bitboards[tablero_num]
+        ocupacion_color = self.ocupacion_color[tablero_num]
+        if anterior:
+            bitboards[anterior[1]._value_][anterior[0]._value_] &= ~bit
+            ocupacion_color[anterior[1]._value_] &= ~bit
+        if pieza:
+            bitboards[pieza[1]._value_][pieza[0]._value_] |= bit
+            ocupacion_color[pieza[1]._value_] |= bit
+        self.ocupacion[tablero_num] = ocupacion_color[0] | ocupacion_color[1]
+        return super()._colocar_pieza(tablero_num, fila, columna, pieza)
+
+    def hay_pieza_en_camino(self, desde_pos, hasta_pos, tablero_num):
+        """Verifica si hay piezas en el camino entre dos posiciones"""
+        desde = desde_pos[0] * 8 + desde_pos[1]
+        hasta = hasta_pos[0] * 8 + hasta_pos[1]
+        for d in range(8):
+            if RAYOS[d][desde] >> hasta & 1:
+                entre = RAYOS[d][desde] & ~RAYOS[d][hasta] & ~(1 << hasta)
+                return bool(entre & self.ocupacion[tablero_num])
+        # Movimientos de caballo o no alineados
+        return super().hay_pieza_en_camino(desde_pos, hasta_pos, tablero_num)
+
+    def movimientos_pieza(self, tipo_pieza, pos, tablero_num):
+        fila, columna = pos
+        pieza_actual = self.obtener_pieza(tablero_num, fila, columna)
+        if not pieza_actual:
+            return []
+
+        casilla = fila * 8 + columna
+        color = pieza_actual[1]._value_
+        propias = self.ocupacion_color[tablero_num][color]
+        rivales = self.ocupacion_color[tablero_num][1 - color]
+        vacias = ~self.ocupacion[tablero_num] & 0xFFFFFFFFFFFFFFFF
+
+        if tipo_pieza == Pieza.PEON:
+            if pieza_actual[1] == Color.BLANCO:
+                avance = (1 << casilla) >> 8 & vacias
+                if avance and fila == 6:
+                    avance |= avance >> 8 & vacias
+            else:
+                avance = (1 << casilla) << 8 & vacias
+                if avance and fila == 1:
+                    avance |= avance << 8 & vacias
+            capturas = ATAQUES_PEON[color][casilla] & rivales
+            return _a_coordenadas(avance) + _a_coordenadas(capturas)
+
+        if tipo_pieza == Pieza.CABALLO:
+            # La casilla destino también debe estar vacía en el tablero espejo
+            espejo = self.ocupacion[3 - tablero_num]
+            saltos = SALTOS_CABALLO[casilla]
+            return _a_coordenadas(saltos & vacias & ~espejo) + _a_coordenadas(saltos & rivales)
+
+        if tipo_pieza in (Pieza.ALFIL, Pieza.TORRE, Pieza.DAMA):
+            if tipo_pieza == Pieza.TORRE:
+                direcciones = DIRECCIONES_TORRE
+            elif tipo_pieza == Pieza.ALFIL:
+                direcciones = DIRECCIONES_ALFIL
+            else:
+                direcciones = DIRECCIONES_TORRE + DIRECCIONES_ALFIL
+            ataques = _ataques_deslizante(casilla, direcciones, self.ocupacion[tablero_num])
+            return _a_coordenadas(ataques & vacias) + _a_coordenadas(ataques & rivales)
+
+        if tipo_pieza == Pieza.REY:
+            movimientos = []
+            movimientos_captura = []
+            # El rey termina en el otro tablero: la casilla debe ser segura allí
+            for destino in _a_coordenadas(PASOS_REY[casilla] & ~propias):
+                if not self.esta_casilla_bajo_ataque(destino[0], destino[1], 3 - tablero_num, pieza_actual[1]):
+                    if rivales >> (destino[0] * 8 + destino[1]) & 1:
+                        movimientos_captura.append(destino)
+                    else:
+                        movimientos.append(destino)
+
+            # Verificar enroque si el rey no se ha movido
+            if not self.reyes_movidos[pieza_actual[1]]:
+                fila_rey = 7 if pieza_actual[1] == Color.BLANCO else 0
+                ambos = self.ocupacion[1] | self.ocupacion[2]
+                torres = self.bitboards[tablero_num][color][TORRE]
+                rey_seguro = not self.esta_casilla_bajo_ataque(fila_rey, 4, tablero_num, pieza_actual[1])
+                for lado, columnas, col_torre, col_destino in [('kingside', range(5, 7), 7, 6),
+                                                               ('queenside', range(1, 4), 0, 2)]:
+                    if self.torres_movidas[pieza_actual[1]][lado]:
+                        continue
+                    # Las casillas intermedias deben estar vacías en ambos tableros y no atacadas
+                    camino = _mascara((fila_rey, col) for col in columnas)
+                    if (not camino & ambos and rey_seguro and
+                            torres >> (fila_rey * 8 + col_torre) & 1 and
+                            not any(self.esta_casilla_bajo_ataque(fila_rey, col, tablero_num, pieza_actual[1])
+                                    for col in columnas)):
+                        movimientos.append((fila_rey, col_destino))
+            return movimientos + movimientos_captura
+
+        return []
+
+    def capturas_pieza(self, tipo_pieza, pos, tablero_num):
+        fila, columna = pos
+        pieza_actual = self.obtener_pieza(tablero_num, fila, columna)
+        if not pieza_actual:
+            return []
+
+        casilla = fila * 8 + columna
+        color = pieza_actual[1]._value_
+        rivales = self.ocupacion_color[tablero_num][1 - color]
+
+        if tipo_pieza == Pieza.PEON:
+            return _a_coordenadas(ATAQUES_PEON[color][casilla] & rivales)
+        if tipo_pieza == Pieza.CABALLO:
+            return _a_coordenadas(SALTOS_CABALLO[casilla] & rivales)
+        if tipo_pieza in (Pieza.ALFIL, Pieza.TORRE, Pieza.DAMA):
+            if tipo_pieza == Pieza.TORRE:
+                direcciones = DIRECCIONES_TORRE
+            elif tipo_pieza == Pieza.ALFIL:
+                direcciones = DIRECCIONES_ALFIL
+            else:
+                direcciones = DIRECCIONES_TORRE + DIRECCIONES_ALFIL
+            return _a_coordenadas(_ataques_deslizante(casilla, direcciones, self.ocupacion[tablero_num]) & rivales)
+        if tipo_pieza == Pieza.REY:
+            return [destino for destino in _a_coordenadas(PASOS_REY[casilla] & rivales)
+                    if not self.esta_casilla_bajo_ataque(destino[0], destino[1], 3 - tablero_num, pieza_actual[1])]
+        return []
+
+    def analizar_rey(self, color):
+        """
+        Igual que TableroAlice.analizar_rey, pero los jaques y las piezas de
+        cada rayo se leen de las máscaras en lugar de recorrer las casillas.
+        """
+        posicion = self._reyes[color._value_]
+        if posicion is None:
+            return None
+        tablero_rey, fila, columna = posicion
+        casilla_rey = fila * 8 + columna
+        atacantes = self.bitboards[tablero_rey][1 - color._value_]
+
+        jaques_fijos = (ATAQUES_PEON[color._value_][casilla_rey] & atacantes[PEON] |
+                        SALTOS_CABALLO[casilla_rey] & atacantes[CABALLO] |
+                        PASOS_REY[casilla_rey] & atacantes[REY])
+        # Un jaque fijo solo se resuelve capturando la pieza; dos, de ninguna forma
+        if not jaques_fijos:
+            bloqueos = ~0
+        elif jaques_fijos & (jaques_fijos - 1):
+            bloqueos = 0
+        else:
+            bloqueos = jaques_fijos
+
+        ocupacion = self.ocupacion[tablero_rey]
+        deslizantes = [atacantes[TORRE] | atacantes[DAMA], atacantes[ALFIL] | atacantes[DAMA]]
+        rayos = []
+        direccion_casilla = {}
+        direcciones_jaque = []
+        for direccion in range(8):
+            rayo = RAYOS[direccion][casilla_rey]
+            ocupadas = rayo & ocupacion
+            rivales = deslizantes[direccion >= 4]
+            piezas = []
+            # Las tres primeras piezas, de la más cercana al rey a la más lejana
+            while ocupadas and len(piezas) < 3:
+                if DIRECCION_POSITIVA[direccion]:
+                    casilla = (ocupadas & -ocupadas).bit_length() - 1
+                else:
+                    casilla = ocupadas.bit_length() - 1
+                ocupadas ^= 1 << casilla
+                piezas.append((casilla, bool(rivales >> casilla & 1)))
+                direccion_casilla[casilla] = direccion
+            rayos.append(piezas)
+            if piezas and piezas[0][1]:
+                # Jaque de un deslizante: se resuelve ocupando el camino o su casilla
+                direcciones_jaque.append(direccion)
+                bloqueos &= rayo ^ RAYOS[direccion][piezas[0][0]]
+        return (tablero_rey, casilla_rey, jaques_fijos, direcciones_jaque,
+                rayos, direccion_casilla, bloqueos)
+
+    def esta_casilla_bajo_ataque(self, fila, columna, tablero_num, color_defensor):
+        """
+        Verifica si una casilla está bajo ataque por piezas del color opuesto
+        """
+        casilla = fila * 8 + columna
+        defensor = color_defensor._value_
+        atacantes = self.bitboards[tablero_num][1 - defensor]
+
+        # Un peón rival ataca la casilla si está donde atacaría un peón propio
+        if ATAQUES_PEON[defensor][casilla] & atacantes[PEON]:
+            return True
+        if SALTOS_CABALLO[casilla] & atacantes[CABALLO]:
+            return True
+        if PASOS_REY[casilla] & atacantes[REY]:
+            return True
+
+        # Solo hace falta seguir los rayos si algún deslizante está alineado con la casilla
+        damas = atacantes[DAMA]
+        torres = (atacantes[TORRE] | damas) & LINEAS_TORRE[casilla]
+        alfiles = (atacantes[ALFIL] | damas) & LINEAS_ALFIL[casilla]
+        if torres and _ataques_deslizante(casilla, DIRECCIONES_TORRE, self.ocupacion[tablero_num]) & torres:
+            return True
+        if alfiles and _ataques_deslizante(casilla, DIRECCIONES_ALFIL, self.ocupacion[tablero_num]) & alfiles:
+            return True
+        return False
+
+# Implementaciones del tablero que se pueden elegir por nombre (perft, benchmark, autojuego)
+BACKENDS = {
+    'listas': TableroAlice,
+    'bitboard': TableroBitboard,
+}
@@ -0,0 +1,85 @@
+# Tipos de valor almacenados en la tabla
+EXACTO = 0
+COTA_INFERIOR = 1
+COTA_SUPERIOR = 2
+
+
+class TablaTransposicion:
+    """
+    Tabla de transposición de tamaño fijo indexada por la clave Zobrist del
+    tablero. Cada entrada guarda (clave, profundidad, valor, tipo, mejor
+    movimiento, generación).
+    """
+    # Estimación del coste en memoria de una entrada (tupla, enteros y ranura de la lista)
+    BYTES_POR_ENTRADA = 160
+
+    def __init__(self, memoria_mb=16):
+        """
+        :param memoria_mb: Memoria máxima aproximada que puede ocupar la tabla.
+        """
+        entradas = max(1, int(memoria_mb * 1024 * 1024) // self.BYTES_POR_ENTRADA)
+        # Usar una potencia de dos para indexar con una máscara
+        tamano = 1 << (entradas.bit_length() - 1)
+        self.mascara = tamano - 1
+        self.entradas = [None] * tamano
+        self.generacion = 0
+
+    def nueva_busqueda(self):
+        """Marca las entradas existentes como de una búsqueda anterior"""
+        self.generacion += 1
+
+    def limpiar(self):
+        self.entradas = [None] * len(self.entradas)
+        self.generacion = 0
+
+    def buscar(self, clave):
+        """Devuelve la entrada de la clave o None si no está en la tabla"""
+        entrada = self.entradas[clave & self.mascara]
+        if entrada is not None and entrada[0] == clave:
+            return entrada
+        return None
+
+    def guardar(self, clave, profundidad, valor, tipo, mejor_movimiento):
+        """
+        Guarda un resultado. Se reemplaza la entrada existente si es de la misma
+        posición, de una búsqueda anterior o de menor o igual profundidad.
+        """
+        indice = clave & self.mascara
+        actual = self.entradas[indice]
+        if (actual is None or actual[0] == clave or actual[5] != self.generacion
+                or profundidad >= actual[1]):
+            if mejor_movimiento is None and actual is not None and actual[0] == clave:
+                # Conservar el mejor movimiento conocido para ordenar
+                mejor_movimiento = actual[4]
+            self.entradas[indice] = (clave, profundidad, valor, tipo, mejor_movimiento, self.generacion)
+
+
+class TablaPeones:
+    """
+    Caché de tamaño fijo de la evaluación de la estructura de peones,
+    indexada por la clave Zobrist de los peones de un tablero. Cada ranura
+    guarda la última clave escrita y su valor.
+    """
+    def __init__(self, entradas=1 << 14):
+        """
+        :param entradas: Número de ranuras; se redondea a una potencia de dos.
+        """
+        tamano = 1 << (max(1, entradas).bit_length() - 1)
+        self.mascara = tamano - 1
+        self.claves = [None] * tamano
+        self.valores = [0] * tamano
+
+    def limpiar(self):
+        self.claves = [None] * len(self.claves)
+
+    def buscar(self, clave):
+        """Devuelve el valor guardado para la clave o None si no está en la caché"""
+        indice = clave & self.mascara
+        if self.claves[indice] == clave:
+            return self.valores[indice]
+        return None
+
+    def guardar(self, clave, valor):
+        indice = clave & self.mascara
+        self.claves[indice] = clave
+        self.valores[indice] = valor